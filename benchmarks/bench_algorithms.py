@@ -0,0 +1,92 @@
+"""
+Time the registered correction algorithms on the trials of a dataset.
+
+The AOIs and the per-stimulus inputs are computed once per stimulus image
+and shared by every algorithm, exactly as in the GUI and the batch runner.
+
+usage: python benchmarks/bench_algorithms.py datasets/Carr2022 [--cost fast]
+           [--algorithms attach chain ...] [--limit 50] [--repeat 3]
+"""
+
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+
+from fix8.core import algorithms, mini_emtk, trial_io
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def load_fixations(trial_path):
+    eye_events = trial_io.json_to_df(trial_path)
+    return np.array(eye_events[["x_cord", "y_cord"]], dtype=float)
+
+
+def find_stimuli(dataset):
+    """Map every folder holding a stimulus image to the JSON trials in it."""
+    stimuli = {}
+    for folder, _, files in sorted(os.walk(dataset)):
+        images = sorted(f for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+        trials = sorted(f for f in files if f.endswith(".json"))
+        if images and trials:
+            stimuli[os.path.join(folder, images[0])] = [os.path.join(folder, f) for f in trials]
+    return stimuli
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dataset", help="folder with stimulus images and JSON trials")
+    parser.add_argument("--cost", choices=algorithms.COST_CLASSES, help="only run algorithms of this cost class")
+    parser.add_argument("--algorithms", nargs="+", help="names of the algorithms to run")
+    parser.add_argument("--limit", type=int, default=None, help="maximum number of trials")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per trial, the best one is kept")
+    args = parser.parse_args()
+
+    names = args.algorithms or algorithms.names(args.cost)
+    stimuli = find_stimuli(args.dataset)
+    timings = {name: 0.0 for name in names}
+    setup = 0.0
+    n_stimuli = n_trials = 0
+    warnings.simplefilter("ignore")
+
+    for image, trials in stimuli.items():
+        if args.limit is not None and n_trials >= args.limit:
+            break
+        trials = trials[:None if args.limit is None else args.limit - n_trials]
+        start = time.perf_counter()
+        aoi, _ = mini_emtk.EMTK_find_aoi(image)
+        stimulus = algorithms.Stimulus(aoi)
+        # compute the shared inputs up front so they are not timed as part
+        # of whichever algorithm happens to run first
+        for name in ("line_Y", "word_XY", "line_index"):
+            getattr(stimulus, name)
+        setup += time.perf_counter() - start
+        n_stimuli += 1
+
+        for trial in trials:
+            fixation_XY = load_fixations(trial)
+            if len(fixation_XY) < 2:
+                continue
+            n_trials += 1
+            for name in names:
+                algorithm = algorithms.get(name)
+                best = np.inf
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    algorithm.run(fixation_XY.copy(), stimulus)
+                    best = min(best, time.perf_counter() - start)
+                timings[name] += best
+
+    print(str(n_trials) + " trials on " + str(n_stimuli) + " stimuli, stimulus setup " + format(setup, ".2f") + " s")
+    print(format("algorithm", "<16") + format("cost", "<10") + format("total s", ">10") + format("ms/trial", ">10"))
+    for name in names:
+        per_trial = 1000 * timings[name] / max(n_trials, 1)
+        print(format(name, "<16") + format(algorithms.get(name).cost, "<10") + format(timings[name], ">10.2f") + format(per_trial, ">10.2f"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measure how long importing Fix8's modules takes in a fresh interpreter.
+
+Each module is imported in a new Python process (like a batch worker
+starting up), the best wall time of --repeat runs is reported, and the
+heavy third-party packages that the import actually executed are listed.
+
+usage: python benchmarks/bench_import.py [module ...] [--repeat 5]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+
+DEFAULT_MODULES = [
+    "numpy",
+    "fix8.core",
+    "fix8.core.driftAlgorithms",
+    "fix8.core.algorithms",
+    "fix8.core.mini_emtk",
+    "fix8.core.trial_io",
+    "fix8.core.correction",
+    "fix8.batch",
+]
+HEAVY = ["scipy", "pandas", "PIL.Image", "matplotlib", "PyQt5"]
+
+PROBE = """
+import sys, time, json, types
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+# modules behind a lazy_import are in sys.modules as importlib's
+# _LazyModule until they are first used
+loaded = [name for name in {heavy!r}
+          if name in sys.modules and type(sys.modules[name]) is types.ModuleType]
+print(json.dumps([elapsed, loaded]))
+"""
+
+
+def time_import(module, repeat):
+    best, loaded = float("inf"), []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        elapsed, loaded = json.loads(output)
+        best = min(best, elapsed)
+    return best, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(format("module", "<28") + format("ms", ">8") + "  heavy packages loaded")
+    for module in args.modules:
+        best, loaded = time_import(module, args.repeat)
+        print(format(module, "<28") + format(1000 * best, ">8.1f") + "  " + (", ".join(loaded) or "-"))
+
+
+if __name__ == "__main__":
+    main()
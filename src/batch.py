@@ -0,0 +1,236 @@
+"""
+fix8-batch: correct every trial of a dataset without the GUI.
+
+The dataset folder is walked like the GUI's "Open Folder": every folder that
+holds a stimulus image (the first .png/.jpg/.jpeg found) and JSON, CSV or
+.npy trials is one stimulus. The AOIs of a stimulus are found once and
+shared by all of its trials, and stimuli are corrected in parallel across a
+process pool. Each trial is written next to the original (or under --output-dir) as
+<trial>_CORRECTED.json, .csv or .npy, in the same format as the GUI's
+"Save Corrections" (see trial_io for .npy).
+
+This module never imports PyQt5, so it runs on machines without a display.
+
+usage: fix8-batch DATASET --algorithm NAME [--param NAME=VALUE ...] [--jobs N]
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .core import algorithms
+from .core import aoi_cache
+from .core import mini_emtk
+from .core import trial_io
+
+
+NOT_TRIALS = ("_AOI.csv", "_hit_test.csv")
+# the corrections written by fix8-batch
+CORRECTED_TRIALS = tuple("_CORRECTED" + extension for extension in trial_io.TRIAL_EXTENSIONS)
+CORRECTED_CHOICES = ("exclude", "include", "only")
+
+
+def find_stimuli(dataset, corrected="exclude"):
+    """Pair the trials of a dataset with their stimulus images.
+
+    Parameters
+    ----------
+    dataset : str
+        root folder of the dataset
+    corrected : str, optional
+        one of CORRECTED_CHOICES: leave out the corrected trials
+        (CORRECTED_TRIALS), include them with the others, or find only them
+
+    Returns
+    -------
+    list of (str, list of str)
+        (image path, trial paths) for every folder that has both
+    """
+    if corrected not in CORRECTED_CHOICES:
+        raise ValueError("corrected must be one of " + ", ".join(CORRECTED_CHOICES))
+    stimuli = []
+    for folder, subfolders, files in os.walk(dataset):
+        subfolders.sort()
+        files = sorted(files)
+        images = [f for f in files if f.lower().endswith(aoi_cache.IMAGE_EXTENSIONS)]
+        trials = [f for f in files if f.endswith(trial_io.TRIAL_EXTENSIONS) and not f.endswith(NOT_TRIALS)
+                  and (corrected == "include" or f.endswith(CORRECTED_TRIALS) == (corrected == "only"))]
+        if images and trials:
+            stimuli.append((os.path.join(folder, images[0]), [os.path.join(folder, f) for f in trials]))
+    return stimuli
+
+
+def correct_trial(eye_events, algorithm, stimulus, parameters):
+    """Apply algorithm to the fixations of eye_events, in place, like "Correct All"."""
+    fixation_rows = eye_events["eye_event"] == "fixation"
+    original_fixations = np.array(eye_events.loc[fixation_rows, ['x_cord', 'y_cord', 'duration']])
+    fixation_XY = np.array(original_fixations[:, 0:2])
+    original_fixations[:, 0:2] = algorithm.run(fixation_XY, stimulus, **parameters)
+    eye_events.loc[fixation_rows, ["x_cord", "y_cord"]] = original_fixations[:, 0:2]
+    return eye_events
+
+
+def output_path(trial_path, dataset, output_dir, output_format):
+    root, extension = os.path.splitext(trial_path)
+    if output_format != "same":
+        extension = "." + output_format
+    file_name = root + "_CORRECTED" + extension
+    if output_dir is None:
+        return file_name
+    return os.path.join(output_dir, os.path.relpath(file_name, dataset))
+
+
+def correct_stimulus(job):
+    """Correct the trials of one stimulus; runs in a worker process.
+
+    Returns a list of (trial path, output path, error message or None);
+    a trial that was skipped because its output exists has output None.
+    """
+    image, trial_paths, options = job
+    algorithm = algorithms.get(options["algorithm"])
+    results = []
+    try:
+        find_aoi = mini_emtk.EMTK_find_aoi
+        if options["aoi_cache"] is not False:
+            find_aoi = aoi_cache.AOICache(options["aoi_cache"]).find_aoi
+        aoi, _ = find_aoi(
+            image,
+            margin_height=options["aoi_height"],
+            margin_width=options["aoi_width"],
+        )
+    except Exception as error:
+        return [(trial_path, None, "AOI error in " + image + ": " + str(error)) for trial_path in trial_paths]
+    stimulus = algorithms.Stimulus(aoi)
+
+    for trial_path in trial_paths:
+        corrected_path = output_path(trial_path, options["dataset"], options["output_dir"], options["format"])
+        if os.path.exists(corrected_path) and not options["overwrite"]:
+            results.append((trial_path, None, None))
+            continue
+        try:
+            eye_events = trial_io.read_trial(trial_path)
+            correct_trial(eye_events, algorithm, stimulus, options["parameters"])
+            os.makedirs(os.path.dirname(corrected_path) or ".", exist_ok=True)
+            if corrected_path.endswith(".json"):
+                trial_io.write_corrections_json(eye_events, corrected_path)
+            elif corrected_path.endswith(".npy"):
+                trial_io.write_trial_npy(eye_events, corrected_path)
+            else:
+                trial_io.write_corrections_csv(eye_events, corrected_path)
+        except Exception as error:
+            results.append((trial_path, None, str(error)))
+            continue
+        results.append((trial_path, corrected_path, None))
+    return results
+
+
+def parse_parameters(algorithm, assignments):
+    """Turn ["x_thresh=100", ...] into keyword arguments of algorithm.
+
+    Values are read as JSON when possible (numbers, lists, true/false/null)
+    and as plain strings otherwise.
+    """
+    parameters = {}
+    for assignment in assignments:
+        name, separator, value = assignment.partition("=")
+        if not separator:
+            raise ValueError("parameters are given as NAME=VALUE, got " + assignment)
+        if name not in algorithm.parameters:
+            raise ValueError(algorithm.name + " has no parameter " + name
+                             + " (parameters: " + ", ".join(algorithm.parameters) + ")")
+        try:
+            parameters[name] = json.loads(value)
+        except ValueError:
+            parameters[name] = value
+    return parameters
+
+
+def make_jobs(stimuli, options, chunk_size):
+    # large stimuli are split so their trials spread over the workers; each
+    # chunk finds the AOIs of the stimulus again
+    jobs = []
+    for image, trial_paths in stimuli:
+        for start in range(0, len(trial_paths), chunk_size):
+            jobs.append((image, trial_paths[start:start + chunk_size], options))
+    return jobs
+
+
+def run_jobs(jobs, n_jobs):
+    """Yield the results of correct_stimulus for each job, in order."""
+    if n_jobs is not None and n_jobs <= 1:
+        yield from map(correct_stimulus, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        yield from executor.map(correct_stimulus, jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fix8-batch",
+        description="Correct all trials of a dataset with one of Fix8's algorithms, without the GUI.",
+    )
+    parser.add_argument("dataset", help="root folder of the dataset")
+    parser.add_argument("-a", "--algorithm", required=True, choices=algorithms.names(),
+                        help="correction algorithm (or warp hybrid) to apply")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="override an algorithm parameter, may be repeated")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="write corrections under this folder, mirroring the dataset (default: next to each trial)")
+    parser.add_argument("--format", choices=("same", "json", "csv", "npy"), default="same",
+                        help="output format (default: same as the trial)")
+    parser.add_argument("--aoi-width", type=int, default=7, help="AOI margin width (default: 7)")
+    parser.add_argument("--aoi-height", type=int, default=4, help="AOI margin height (default: 4)")
+    parser.add_argument("--aoi-cache", default=None, metavar="DIR",
+                        help="AOI cache folder (default: " + aoi_cache.default_cache_directory() + ")")
+    parser.add_argument("--no-aoi-cache", action="store_true", help="always detect AOIs from the images")
+    parser.add_argument("--chunk-size", type=int, default=64, help="trials per job (default: 64)")
+    parser.add_argument("--overwrite", action="store_true", help="replace existing corrected files")
+    args = parser.parse_args(argv)
+
+    try:
+        parameters = parse_parameters(algorithms.get(args.algorithm), args.param)
+    except ValueError as error:
+        parser.error(str(error))
+
+    stimuli = find_stimuli(args.dataset)
+    if not stimuli:
+        parser.error("no folders with a stimulus image and trials found in " + args.dataset)
+
+    options = {
+        "algorithm": args.algorithm,
+        "parameters": parameters,
+        "dataset": args.dataset,
+        "output_dir": args.output_dir,
+        "format": args.format,
+        "aoi_width": args.aoi_width,
+        "aoi_height": args.aoi_height,
+        "aoi_cache": False if args.no_aoi_cache else args.aoi_cache,
+        "overwrite": args.overwrite,
+    }
+    jobs = make_jobs(stimuli, options, max(args.chunk_size, 1))
+
+    corrected = skipped = failed = 0
+    for results in run_jobs(jobs, args.jobs):
+        for trial_path, corrected_path, error in results:
+            if error is not None:
+                failed += 1
+                print("failed: " + trial_path + ": " + error, file=sys.stderr)
+            elif corrected_path is None:
+                skipped += 1
+            else:
+                corrected += 1
+                print(corrected_path)
+
+    print(str(corrected) + " corrected, " + str(skipped) + " skipped (already corrected), "
+          + str(failed) + " failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+"""
+Fix8's core: the data I/O, AOI detection, correction algorithms and eye
+movement metrics, without any GUI.
+
+Importing fix8.core or any of its modules only loads NumPy; SciPy, pandas
+and Pillow are loaded the first time a function needs them, so scripts and
+batch worker processes that only use part of the core start quickly.
+"""
@@ -0,0 +1,199 @@
+"""
+Registry of the correction algorithms available in Fix8.
+
+Every algorithm declares the per-stimulus inputs it takes (line_Y, word_XY,
+a secondary algorithm for the warp hybrids), its parameters with their
+defaults and a rough cost class. The GUI, the batch runner and the
+benchmarks dispatch through the registry, and the per-stimulus inputs are
+computed once in a Stimulus and shared by every algorithm run on it.
+"""
+
+import inspect
+
+import numpy as np
+
+from . import driftAlgorithms as drift
+from .layout import StimulusLayout
+
+
+# cost classes, from cheapest to most expensive
+FAST = "fast"
+MODERATE = "moderate"
+SLOW = "slow"
+COST_CLASSES = (FAST, MODERATE, SLOW)
+
+# how the GUI can run an algorithm: correct every fixation at once, or
+# suggest corrections one fixation at a time
+AUTO = "auto"
+SEMI = "semi"
+MODES = (AUTO, SEMI)
+
+
+class Stimulus:
+    """Per-stimulus inputs of the correction algorithms.
+
+    Each input is derived from the AOIs on first use and cached, so running
+    several algorithms (or the same algorithm repeatedly, as in semi-automated
+    mode) on one stimulus only computes them once. The arrays are read-only
+    because they are shared between runs.
+
+    Parameters
+    ----------
+    aoi : pandas.DataFrame
+        AOIs of the stimulus, as returned by mini_emtk.EMTK_find_aoi
+    """
+
+    def __init__(self, aoi):
+        self.aoi = aoi
+        self._inputs = {}
+
+    def _cached(self, name, compute):
+        if name not in self._inputs:
+            self._inputs[name] = compute()
+        return self._inputs[name]
+
+    @property
+    def layout(self):
+        return self._cached("layout", lambda: StimulusLayout(self.aoi))
+
+    @property
+    def line_Y(self):
+        # in table order, like mini_emtk.find_lines_y
+        return self._cached("line_Y", lambda: _read_only(self.layout.lines_in_table_order()))
+
+    @property
+    def word_XY(self):
+        return self._cached("word_XY", lambda: _read_only(self.layout.word_XY.copy()))
+
+    @property
+    def line_index(self):
+        return self._cached("line_index", lambda: drift.text_line_index(self.word_XY))
+
+    @property
+    def dtw_cache(self):
+        return self._cached("dtw_cache", dict)
+
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+
+class Algorithm:
+    """A registered correction algorithm.
+
+    Parameters
+    ----------
+    name : str
+        name shown in the GUI and written to the metadata, e.g. "warp+chain"
+    function : callable
+        called as function(fixation_XY, *inputs, [secondary], **parameters)
+    inputs : tuple of str
+        names of the Stimulus inputs passed positionally after fixation_XY
+    cost : str
+        one of FAST, MODERATE or SLOW
+    secondary : str, optional
+        name of the registered algorithm passed to hybrid algorithms
+    shared : tuple of str, optional
+        names of Stimulus inputs passed by keyword, e.g. caches
+    modes : tuple of str, optional
+        the MODES the GUI offers the algorithm in, none to leave it out of
+        the Correction menus
+    """
+
+    def __init__(self, name, function, inputs, cost, secondary=None, shared=(), modes=MODES):
+        if cost not in COST_CLASSES:
+            raise ValueError("unknown cost class " + str(cost))
+        if set(modes) - set(MODES):
+            raise ValueError("unknown modes " + ", ".join(sorted(set(modes) - set(MODES))))
+        self.name = name
+        self.function = function
+        self.inputs = tuple(inputs)
+        self.cost = cost
+        self.secondary = secondary
+        self.shared = tuple(shared)
+        self.modes = tuple(modes)
+        self.parameters = {
+            parameter.name: parameter.default
+            for parameter in inspect.signature(function).parameters.values()
+            if parameter.default is not inspect.Parameter.empty and parameter.name not in self.shared
+        }
+
+    def __repr__(self):
+        return "Algorithm(" + repr(self.name) + ")"
+
+    def run(self, fixation_XY, stimulus, **parameters):
+        """Correct fixation_XY (an n x 2 array, modified in place) on stimulus.
+
+        Parameters
+        ----------
+        fixation_XY : numpy.ndarray
+            x and y coordinates of the fixations
+        stimulus : Stimulus
+            the stimulus the fixations were recorded on
+        **parameters
+            overrides of the algorithm's parameter defaults
+
+        Returns
+        -------
+        numpy.ndarray
+            the corrected fixation_XY
+        """
+        unknown = set(parameters) - set(self.parameters)
+        if unknown:
+            raise TypeError(self.name + " got unexpected parameters " + ", ".join(sorted(unknown)))
+        args = [getattr(stimulus, name) for name in self.inputs]
+        if self.secondary is not None:
+            args.append(get(self.secondary).function)
+        for name in self.shared:
+            parameters[name] = getattr(stimulus, name)
+        return self.function(fixation_XY, *args, **parameters)
+
+
+def _warp_regs(fixation_XY, line_Y, word_XY, algorithm):
+    # correction imports the plotting and drawing libraries, only load
+    # them when a hybrid is actually run
+    from . import correction
+    return correction.warp_regs(fixation_XY, line_Y, word_XY, algorithm)
+
+
+ALGORITHMS = {}
+
+
+def register(algorithm):
+    """Add algorithm to the registry and return it."""
+    if algorithm.name in ALGORITHMS:
+        raise ValueError("algorithm " + algorithm.name + " is already registered")
+    ALGORITHMS[algorithm.name] = algorithm
+    return algorithm
+
+
+def get(name):
+    """Return the registered algorithm called name."""
+    try:
+        return ALGORITHMS[name]
+    except KeyError:
+        raise KeyError("unknown algorithm " + str(name)) from None
+
+
+def names(cost=None, mode=None):
+    """Names of the registered algorithms, optionally of one cost class or offered in one mode."""
+    return [name for name, algorithm in ALGORITHMS.items()
+            if (cost is None or algorithm.cost == cost) and (mode is None or mode in algorithm.modes)]
+
+
+register(Algorithm("attach", drift.attach, ("line_Y",), FAST))
+register(Algorithm("chain", drift.chain, ("line_Y",), FAST))
+register(Algorithm("cluster", drift.cluster, ("line_Y",), FAST))
+register(Algorithm("compare", drift.compare, ("word_XY",), MODERATE, shared=("line_index", "dtw_cache"),
+                   modes=()))
+register(Algorithm("merge", drift.merge, ("line_Y",), MODERATE))
+register(Algorithm("regress", drift.regress, ("line_Y",), MODERATE))
+register(Algorithm("segment", drift.segment, ("line_Y",), FAST))
+register(Algorithm("slice", drift.slice, ("line_Y",), FAST))
+register(Algorithm("stretch", drift.stretch, ("line_Y",), MODERATE))
+register(Algorithm("warp", drift.warp, ("word_XY",), SLOW))
+register(Algorithm("warp+attach", _warp_regs, ("line_Y", "word_XY"), SLOW, secondary="attach"))
+register(Algorithm("warp+chain", _warp_regs, ("line_Y", "word_XY"), SLOW, secondary="chain"))
+register(Algorithm("warp+regress", _warp_regs, ("line_Y", "word_XY"), SLOW, secondary="regress"))
+register(Algorithm("warp+stretch", _warp_regs, ("line_Y", "word_XY"), SLOW, secondary="stretch"))
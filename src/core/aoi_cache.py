@@ -0,0 +1,202 @@
+"""
+On-disk cache of detected AOIs.
+
+Finding the AOIs of a stimulus scans the whole image, and Fix8 does it every
+time a trial folder or image is opened, for every margin change and for
+every batch job. The cache stores the AOI table and background color of an
+image per (image content hash, level, margin_height, margin_width), so
+reopening a stimulus costs one small file read. Entries are keyed on the
+image's content, so an edited image is simply a cache miss, and on
+mini_emtk.AOI_DETECTOR_VERSION, so a changed detector is one too. The least
+recently used entries are removed once the cache holds max_entries files.
+AOIs precomputed by fix8-index (see aoi_index) are used before the cache.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from . import aoi_index
+from . import mini_emtk
+from .lazy import lazy_import
+
+# loaded on first use, see fix8.core
+pd = lazy_import("pandas")
+
+
+AOI_COLUMNS = ["kind", "name", "x", "y", "width", "height", "image"]
+
+# stimulus images, as found by fix8-batch, fix8-index and fix8-metrics
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def default_cache_directory():
+    """$FIX8_CACHE_DIR, or fix8/aoi in the user's cache directory."""
+    if os.environ.get("FIX8_CACHE_DIR"):
+        return os.path.join(os.environ["FIX8_CACHE_DIR"], "aoi")
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "fix8", "aoi")
+
+
+# content hashes by (absolute path, size, modification time)
+_image_hashes = {}
+
+
+def image_hash(image_file_name):
+    """SHA-1 of the image file's bytes.
+
+    Hashes are remembered per (path, size, modification time), so an
+    image is only read again after it changed.
+    """
+    status = os.stat(image_file_name)
+    key = (os.path.abspath(image_file_name), status.st_size, status.st_mtime_ns)
+    if key not in _image_hashes:
+        digest = hashlib.sha1()
+        with open(image_file_name, "rb") as image:
+            for block in iter(lambda: image.read(1 << 20), b""):
+                digest.update(block)
+        _image_hashes[key] = digest.hexdigest()
+    return _image_hashes[key]
+
+
+class AOICache:
+    """Cache of EMTK_find_aoi results in a directory.
+
+    Parameters
+    ----------
+    directory : str, optional
+        where the entries are stored, default_cache_directory() by default
+    max_entries : int, optional
+        the least recently used entries beyond this many are deleted
+    """
+
+    def __init__(self, directory=None, max_entries=2000):
+        self.directory = directory or default_cache_directory()
+        self.max_entries = max_entries
+        # the detector of the last image scanned, so that trying other
+        # margins on the same stimulus does not read the image again
+        self._detector_key = None
+        self._detector = None
+
+    def find_aoi(self, image_file_name, level="sub-line", margin_height=4, margin_width=7, write=True):
+        """Same as mini_emtk.EMTK_find_aoi(image_file_name, ...), from the cache when possible.
+
+        With write=False, AOIs that had to be detected are not added to the
+        cache. The GUI passes it while margins are being tuned, and writes
+        only the margins settled on with a later call, which reuses the
+        detector kept in memory.
+
+        Returns
+        -------
+        (pandas.DataFrame, str)
+            the AOIs and the background color of the image
+        """
+        index = aoi_index.find_index(image_file_name)
+        if index is not None:
+            found = index.find_aoi(image_file_name, level, margin_height, margin_width)
+            if found is not None:
+                return found
+
+        content_hash = image_hash(image_file_name)
+        entry = self._entry_path(content_hash, level, margin_height, margin_width)
+        image = image_file_name.split("/")[-1]
+
+        cached = self._read(entry)
+        if cached is not None:
+            rows, bg_color = cached
+            return _aoi_frame([row + [image] for row in rows]), bg_color
+
+        aoi, bg_color = self.detector(image_file_name, content_hash).find_aoi(level, margin_height, margin_width)
+        # the image name is not part of the entry, an identical image under
+        # another name shares it
+        if write:
+            rows = aoi[AOI_COLUMNS[:-1]].values.tolist()
+            self._write(entry, {"rows": rows, "background_color": bg_color})
+        return aoi, bg_color
+
+    def detector(self, image_file_name, content_hash=None):
+        """The mini_emtk.AOIDetector of image_file_name, reused while it is the last image asked for."""
+        key = (image_file_name, content_hash or image_hash(image_file_name))
+        if key != self._detector_key:
+            self._detector = mini_emtk.AOIDetector(image_file_name)
+            self._detector_key = key
+        return self._detector
+
+    def clear(self):
+        """Delete all entries."""
+        for name in self._entries():
+            _remove(os.path.join(self.directory, name))
+
+    def _entry_path(self, content_hash, level, margin_height, margin_width):
+        # entries of an older detector are never read again and are pruned
+        # like any other unused entry
+        name = f"{content_hash}_{level}_{margin_height}_{margin_width}_v{mini_emtk.AOI_DETECTOR_VERSION}.json"
+        return os.path.join(self.directory, name)
+
+    def _entries(self):
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
+    def _read(self, entry):
+        try:
+            with open(entry) as f:
+                data = json.load(f)
+            rows, bg_color = data["rows"], data["background_color"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # missing, being written by another process, or corrupt
+            return None
+        try:
+            # the modification time records the last use, for pruning
+            os.utime(entry)
+        except OSError:
+            pass
+        return rows, bg_color
+
+    def _write(self, entry, data):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # write and rename, so that concurrent batch workers never read
+            # a partial entry
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            # the cache is an optimization; a read-only or full disk is not
+            # an error
+            return
+        try:
+            with os.fdopen(handle, "w") as f:
+                json.dump(data, f)
+            os.replace(temporary, entry)
+        except OSError:
+            _remove(temporary)
+            return
+        self._prune()
+
+    def _prune(self):
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        last_used = []
+        for name in entries:
+            path = os.path.join(self.directory, name)
+            try:
+                last_used.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        last_used.sort()
+        for _, path in last_used[:len(last_used) - self.max_entries]:
+            _remove(path)
+
+
+def _aoi_frame(rows):
+    # object columns holding Python ints, exactly like EMTK_find_aoi
+    return pd.DataFrame(rows, columns=AOI_COLUMNS, dtype=object)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,146 @@
+"""
+Per-dataset index of precomputed AOIs.
+
+fix8-index scans a dataset tree once and writes INDEX_FILE_NAME at its root:
+for every stimulus image, its content hash (plus the size and modification
+time it was hashed at), and for every distinct image content the AOI rows
+and background color per (level, margin_height, margin_width). Identical
+stimuli that are copied into every trial folder are stored once.
+
+find_index() locates the index of any image below a dataset root, and
+AOICache.find_aoi consults it before its own entries, so the GUI and
+fix8-batch pick up an index without any configuration.
+"""
+
+import json
+import os
+import tempfile
+
+from . import aoi_cache
+from . import mini_emtk
+
+
+INDEX_FILE_NAME = "fix8_aoi_index.json"
+INDEX_VERSION = 1
+
+
+def entry_key(content_hash, level, margin_height, margin_width):
+    # an index built by an older detector has none of the current keys
+    return f"{content_hash}_{level}_{margin_height}_{margin_width}_v{mini_emtk.AOI_DETECTOR_VERSION}"
+
+
+class AOIIndex:
+    """The AOI index of one dataset.
+
+    Parameters
+    ----------
+    root : str
+        dataset folder the index belongs to; image paths are relative to it
+    images : dict, optional
+        relative image path -> [content hash, size, modification time in ns]
+    entries : dict, optional
+        entry_key(...) -> {"rows": AOI rows without the image name,
+        "background_color": str}
+    """
+
+    def __init__(self, root, images=None, entries=None):
+        self.root = root
+        self.images = images if images is not None else {}
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        """Read an index file; raises OSError or ValueError if it is missing or not an index."""
+        with open(path) as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            raise ValueError(path + " is not a Fix8 AOI index")
+        return cls(os.path.dirname(os.path.abspath(path)), data["images"], data["entries"])
+
+    def save(self, path=None):
+        """Write the index atomically, to INDEX_FILE_NAME in root by default."""
+        path = path or os.path.join(self.root, INDEX_FILE_NAME)
+        data = {"version": INDEX_VERSION, "images": self.images, "entries": self.entries}
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w") as f:
+                f.write(json.dumps(data, separators=(",", ":")))
+            # an index is part of the dataset, not private like a cache entry
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, path)
+        except BaseException:
+            aoi_cache._remove(temporary)
+            raise
+        return path
+
+    def relative_path(self, image_file_name):
+        return os.path.relpath(os.path.abspath(image_file_name), self.root).replace(os.sep, "/")
+
+    def content_hash(self, image_file_name):
+        """Hash of the image, from the index while its size and modification time are unchanged."""
+        status = os.stat(image_file_name)
+        record = self.images.get(self.relative_path(image_file_name))
+        if record is not None and record[1:] == [status.st_size, status.st_mtime_ns]:
+            return record[0]
+        return aoi_cache.image_hash(image_file_name)
+
+    def add_image(self, image_file_name, content_hash):
+        status = os.stat(image_file_name)
+        self.images[self.relative_path(image_file_name)] = [content_hash, status.st_size, status.st_mtime_ns]
+
+    def find_aoi(self, image_file_name, level="sub-line", margin_height=4, margin_width=7):
+        """(AOIs, background color) of the image like EMTK_find_aoi, or None if the index does not have them."""
+        try:
+            content_hash = self.content_hash(image_file_name)
+        except OSError:
+            return None
+        entry = self.entries.get(entry_key(content_hash, level, margin_height, margin_width))
+        if entry is None:
+            return None
+        image = image_file_name.split("/")[-1]
+        return aoi_cache._aoi_frame([row + [image] for row in entry["rows"]]), entry["background_color"]
+
+
+# loaded indexes by path, with the modification time they were read at
+_indexes = {}
+
+# index path (or None) by the image folder it was searched from
+_index_paths = {}
+
+
+def find_index(image_file_name):
+    """The AOIIndex of the dataset containing the image, or None.
+
+    The image's folder and its parents are searched for INDEX_FILE_NAME
+    once per folder, so an index written later is only found by a new
+    process. A loaded index is kept until the file changes.
+    """
+    folder = os.path.dirname(os.path.abspath(image_file_name))
+    if folder not in _index_paths:
+        _index_paths[folder] = _search_index(folder)
+    path = _index_paths[folder]
+    if path is None:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    loaded = _indexes.get(path)
+    if loaded is None or loaded[0] != mtime:
+        try:
+            loaded = (mtime, AOIIndex.load(path))
+        except (OSError, ValueError, KeyError):
+            loaded = (mtime, None)
+        _indexes[path] = loaded
+    return loaded[1]
+
+
+def _search_index(folder):
+    while True:
+        path = os.path.join(folder, INDEX_FILE_NAME)
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            return None
+        folder = parent
@@ -0,0 +1,917 @@
+import heapq
+import numpy as np
+# from sklearn.cluster import KMeans
+
+######################################################################
+# Nearest-value lookup shared by the algorithms below. values are sorted
+# once; each query is then resolved with np.searchsorted. Ties go to the
+# lowest index in the unsorted values, exactly like
+# np.argmin(abs(values - query)).
+######################################################################
+
+def _sort_for_lookup(values):
+	order = np.argsort(values, kind='stable')
+	return np.asarray(values)[order], order
+
+def _nearest(sorted_values, order, queries):
+	last = len(sorted_values) - 1
+	right = np.searchsorted(sorted_values, queries)
+	left = np.maximum(right - 1, 0)
+	right = np.minimum(right, last)
+	# move to the first of any run of equal values, which has the lowest index
+	left = np.searchsorted(sorted_values, sorted_values[left])
+	left_distance = abs(sorted_values[left] - queries)
+	right_distance = abs(sorted_values[right] - queries)
+	left_index, right_index = order[left], order[right]
+	use_left = (left_distance < right_distance) | ((left_distance == right_distance) & (left_index < right_index))
+	return np.where(use_left, left_index, right_index)
+
+######################################################################
+# ATTACH
+######################################################################
+
+def attach(fixation_XY, line_Y):
+	n = len(fixation_XY)
+	for fixation_i in range(n):
+		line_i = np.argmin(abs(line_Y - fixation_XY[fixation_i, 1]))
+		fixation_XY[fixation_i, 1] = line_Y[line_i]
+	return fixation_XY
+
+######################################################################
+# CHAIN
+# 
+# https://github.com/sascha2schroeder/popEye/
+######################################################################
+
+def chain(fixation_XY, line_Y, x_thresh=192, y_thresh=32):
+	n = len(fixation_XY)
+	dist_X = abs(np.diff(fixation_XY[:, 0]))
+	dist_Y = abs(np.diff(fixation_XY[:, 1]))
+	end_chain_indices = list(np.where(np.logical_or(dist_X > x_thresh, dist_Y > y_thresh))[0] + 1)
+	end_chain_indices.append(n)
+	start_of_chain = 0
+	for end_of_chain in end_chain_indices:
+		mean_y = np.mean(fixation_XY[start_of_chain:end_of_chain, 1])
+		line_i = np.argmin(abs(line_Y - mean_y))
+		fixation_XY[start_of_chain:end_of_chain, 1] = line_Y[line_i]
+		start_of_chain = end_of_chain
+	return fixation_XY
+
+######################################################################
+# CLUSTER
+# 
+# https://github.com/sascha2schroeder/popEye/
+######################################################################
+# added implementation of KMeans instead of using sklearn
+def KMeans(n_clusters, n_init=10, max_iter=300):
+	def fit_predict(X):
+		n = len(X)
+		centers = X[np.random.choice(n, n_clusters, replace=False)]
+		for _ in range(n_init):
+			for _ in range(max_iter):
+				cluster_assignments = np.argmin(np.linalg.norm(X[:, None] - centers, axis=2), axis=1)
+				new_centers = np.array([X[cluster_assignments == i].mean(axis=0) for i in range(n_clusters)])
+				if np.all(centers == new_centers):
+					break
+				centers = new_centers
+		return cluster_assignments
+	return fit_predict
+
+# Exact 1-D k-means by dynamic programming over the sorted values
+# (Wang, H., & Song, M. (2011). Ckmeans.1d.dp: Optimal k-means
+#   clustering in one dimension by dynamic programming. The R Journal,
+#   3(2), 29–33.)
+#
+# In one dimension every optimal cluster is a contiguous run of the
+# sorted values, so the best split into k clusters is found exactly and
+# deterministically. The start of the last cluster is monotone in its
+# end, so each layer of the table is filled by divide and conquer, with
+# every level of the recursion evaluated in one vectorized step. Clusters
+# are labelled in order of increasing center.
+def optimal_kmeans_1d(values, n_clusters):
+	values = np.asarray(values, dtype=float).ravel()
+	n = len(values)
+	k = min(n_clusters, n)
+	order = np.argsort(values, kind='stable')
+	sorted_values = values[order]
+	sum_x = np.concatenate(([0], np.cumsum(sorted_values)))
+	sum_x2 = np.concatenate(([0], np.cumsum(sorted_values**2)))
+
+	def within_cluster_cost(starts, ends):
+		# sum of squared deviations of sorted_values[start:end+1]
+		total = sum_x[ends + 1] - sum_x[starts]
+		return sum_x2[ends + 1] - sum_x2[starts] - total**2 / (ends - starts + 1)
+
+	cost = within_cluster_cost(np.zeros(n, dtype=int), np.arange(n))
+	cluster_starts = np.zeros((k, n), dtype=np.int64)
+	for cluster_i in range(1, k):
+		new_cost = np.full(n, np.inf)
+		# open segments: ends in [first_end, last_end] whose best start
+		# lies in [first_start, last_start]
+		first_end = np.array([cluster_i])
+		last_end = np.array([n - 1])
+		first_start = np.array([cluster_i])
+		last_start = np.array([n - 1])
+		while len(first_end):
+			mid_end = (first_end + last_end) // 2
+			n_candidates = np.minimum(last_start, mid_end) - first_start + 1
+			offsets = np.concatenate(([0], np.cumsum(n_candidates)[:-1]))
+			segment = np.repeat(np.arange(len(first_end)), n_candidates)
+			starts = first_start[segment] + np.arange(len(segment)) - offsets[segment]
+			candidates = cost[starts - 1] + within_cluster_cost(starts, mid_end[segment])
+			best_cost = np.minimum.reduceat(candidates, offsets)
+			is_best = candidates == best_cost[segment]
+			best_start = np.minimum.reduceat(np.where(is_best, starts, n), offsets)
+			new_cost[mid_end] = best_cost
+			cluster_starts[cluster_i, mid_end] = best_start
+			left = first_end < mid_end
+			right = mid_end < last_end
+			first_end, last_end, first_start, last_start = (
+				np.concatenate((first_end[left], mid_end[right] + 1)),
+				np.concatenate((mid_end[left] - 1, last_end[right])),
+				np.concatenate((first_start[left], best_start[right])),
+				np.concatenate((best_start[left], last_start[right])),
+			)
+		cost = new_cost
+	sorted_clusters = np.zeros(n, dtype=int)
+	end = n - 1
+	for cluster_i in range(k - 1, -1, -1):
+		start = cluster_starts[cluster_i, end]
+		sorted_clusters[start:end + 1] = cluster_i
+		end = start - 1
+	clusters = np.empty(n, dtype=int)
+	clusters[order] = sorted_clusters
+	return clusters
+
+def cluster(fixation_XY, line_Y, randomized=False):
+	m = len(line_Y)
+	fixation_Y = fixation_XY[:, 1].reshape(-1, 1)
+	if randomized:
+		# clusters = KMeans(m, n_init=100, max_iter=300).fit_predict(fixation_Y)
+		clusters = KMeans(m, n_init=100, max_iter=300)(fixation_Y)
+	else:
+		clusters = optimal_kmeans_1d(fixation_Y, m)
+	centers = [fixation_Y[clusters == i].mean() for i in range(m)]
+	ordered_cluster_indices = np.argsort(centers)
+	line_ranks = np.empty(m, dtype=int)
+	line_ranks[ordered_cluster_indices] = np.arange(m)
+	fixation_XY[:, 1] = np.asarray(line_Y)[line_ranks[clusters]]
+	return fixation_XY
+
+######################################################################
+# COMPARE
+#
+# Lima Sanches, C., Kise, K., & Augereau, O. (2015). Eye gaze and text
+#   line matching for reading analysis. In Adjunct proceedings of the
+#   2015 ACM International Joint Conference on Pervasive and
+#   Ubiquitous Computing and proceedings of the 2015 ACM International
+#   Symposium on Wearable Computers (pp. 1227–1233). Association for
+#   Computing Machinery.
+#
+# https://doi.org/10.1145/2800835.2807936
+######################################################################
+
+# The words of each text line are indexed once per stimulus with
+# text_line_index() and can be shared across trials. DTW costs can be
+# memoized in a dict keyed on (gaze line x bytes, text line y), which must
+# only be shared between trials on the same stimulus. Gaze lines are
+# scored independently of each other, so with batched=True every (gaze
+# line, candidate line) pair of the trial goes through one cost-only
+# wavefront.
+
+def text_line_index(word_XY):
+	word_XY = np.asarray(word_XY)
+	line_Y = np.unique(word_XY[:, 1])
+	order = np.argsort(word_XY[:, 1], kind='stable')
+	bounds = np.searchsorted(word_XY[order, 1], line_Y, side='right')
+	text_lines = np.split(word_XY[order, 0:1], bounds[:-1])
+	return line_Y, text_lines
+
+def compare(fixation_XY, word_XY, x_thresh=75, n_nearest_lines=3, line_index=None, dtw_cache=None, batched=True):
+	if line_index is None:
+		line_index = text_line_index(word_XY)
+	line_Y, text_lines = line_index
+	if dtw_cache is None:
+		dtw_cache = {}
+	n = len(fixation_XY)
+	diff_X = np.diff(fixation_XY[:, 0])
+	end_line_indices = list(np.where(diff_X < -x_thresh)[0] + 1)
+	end_line_indices.append(n)
+	start_line_indices = [0] + end_line_indices[:-1]
+	candidates = []
+	for start_of_line, end_of_line in zip(start_line_indices, end_line_indices):
+		gaze_line = fixation_XY[start_of_line:end_of_line]
+		mean_y = np.mean(gaze_line[:, 1])
+		lines_ordered_by_proximity = np.argsort(abs(line_Y - mean_y))
+		nearest_line_I = lines_ordered_by_proximity[:n_nearest_lines]
+		gaze_X = gaze_line[:, 0:1]
+		keys = [(gaze_X.tobytes(), line_Y[line_i]) for line_i in nearest_line_I]
+		candidates.append((gaze_X, nearest_line_I, keys))
+	missing = {}
+	for gaze_X, nearest_line_I, keys in candidates:
+		for line_i, key in zip(nearest_line_I, keys):
+			if key not in dtw_cache:
+				missing[key] = (gaze_X, text_lines[line_i])
+	if batched and len(missing) > 1:
+		pairs = list(missing.values())
+		costs = _dtw_costs([gaze_X for gaze_X, _ in pairs], [text_line for _, text_line in pairs])
+		dtw_cache.update(zip(missing, costs))
+	else:
+		for key, (gaze_X, text_line) in missing.items():
+			dtw_cache[key], _ = dynamic_time_warping(gaze_X, text_line)
+	for (start_of_line, end_of_line), (_, nearest_line_I, keys) in zip(zip(start_line_indices, end_line_indices), candidates):
+		line_costs = np.array([dtw_cache[key] for key in keys])
+		line_i = nearest_line_I[np.argmin(line_costs)]
+		fixation_XY[start_of_line:end_of_line, 1] = line_Y[line_i]
+	# print(fixation_XY)
+	return fixation_XY
+
+######################################################################
+# MERGE
+#
+# Špakov, O., Istance, H., Hyrskykari, A., Siirtola, H., & Räihä,
+#   K.-J. (2019). Improving the performance of eye trackers with
+#   limited spatial accuracy and low sampling rates for reading
+#   analysis by heuristic fixation-to-word mapping. Behavior Research
+#   Methods, 51(6), 2661–2687.
+#
+# https://doi.org/10.3758/s13428-018-1120-x
+# https://github.com/uta-gasp/sgwm
+######################################################################
+
+phases = [{'min_i':3, 'min_j':3, 'no_constraints':False}, # Phase 1
+          {'min_i':1, 'min_j':3, 'no_constraints':False}, # Phase 2
+          {'min_i':1, 'min_j':1, 'no_constraints':False}, # Phase 3
+          {'min_i':1, 'min_j':1, 'no_constraints':True}]  # Phase 4
+
+# Each sequence is summarised by its sufficient statistics (n, Σx, Σy,
+# Σxy, Σx², Σy²), so the least-squares line and RMS error of any pair of
+# sequences come from a few additions instead of a fresh np.polyfit.
+# Candidate mergers of a phase sit in a heap ordered like the original
+# nested loop (lowest error, then earliest pair in the sequence list);
+# after a merger only the pairs involving the new sequence are pushed,
+# and pairs involving merged-away sequences are dropped lazily.
+#
+# Where the choice depends on rounding (errors tied within tolerance,
+# fits on the threshold boundaries, or all x equal) the pair is refitted
+# with np.polyfit exactly as before, so the mergers are the same.
+
+def merge(fixation_XY, line_Y, y_thresh=32, g_thresh=0.1, e_thresh=20):
+	n = len(fixation_XY)
+	m = len(line_Y)
+	diff_X = np.diff(fixation_XY[:, 0])
+	dist_Y = abs(np.diff(fixation_XY[:, 1]))
+	sequence_boundaries = list(np.where(np.logical_or(diff_X < 0, dist_Y > y_thresh))[0] + 1)
+	sequence_starts = [0] + sequence_boundaries
+	sequence_ends = sequence_boundaries + [n]
+	sequences = _MergeSequences(fixation_XY, sequence_starts, sequence_ends)
+	for phase in phases:
+		if sequences.n_alive <= m:
+			continue
+		ids = sequences.alive_ids()
+		first, second = np.triu_indices(len(ids), 1)
+		candidates = sequences.candidates(ids[first], ids[second], phase, g_thresh, e_thresh)
+		heapq.heapify(candidates)
+		while sequences.n_alive > m:
+			best_merger = sequences.pop_best(candidates)
+			if best_merger is None:
+				break # no possible mergers, break while and move to next phase
+			merged = sequences.merge(*best_merger)
+			others = sequences.alive_ids()[:-1]
+			new_pairs = np.full(len(others), merged)
+			for candidate in sequences.candidates(others, new_pairs, phase, g_thresh, e_thresh):
+				heapq.heappush(candidates, candidate)
+	sequences = [sequences.members[sequence_i] for sequence_i in sequences.alive_ids()]
+	mean_Y = [fixation_XY[sequence, 1].mean() for sequence in sequences]
+	ordered_sequence_indices = np.argsort(mean_Y)
+	for line_i, sequence_i in enumerate(ordered_sequence_indices):
+		fixation_XY[sequences[sequence_i], 1] = line_Y[line_i]
+	return fixation_XY
+
+def _merge_tolerance(error):
+	return 1e-4 + 1e-8 * error
+
+class _MergeSequences:
+	"""Sequences of the MERGE algorithm and their sufficient statistics,
+	indexed by sequence id. Ids follow the order of the original sequence
+	list: original sequences first, then every merged sequence in the
+	order it was created."""
+
+	def __init__(self, fixation_XY, starts, ends):
+		self.fixation_XY = fixation_XY
+		X = fixation_XY[:, 0].astype(float)
+		Y = fixation_XY[:, 1].astype(float)
+		# statistics are accumulated around the mean fixation to limit
+		# cancellation; the fitted gradient and residuals are unaffected
+		X = X - X.mean()
+		Y = Y - Y.mean()
+		size = 2 * len(starts)
+		self.members = [list(range(start, end)) for start, end in zip(starts, ends)]
+		self.n = np.zeros(size, dtype=int)
+		self.sums = np.zeros((5, size)) # Σx, Σy, Σxy, Σx², Σy²
+		self.min_x = np.zeros(size)
+		self.max_x = np.zeros(size)
+		self.alive = np.zeros(size, dtype=bool)
+		for sequence_i, (start, end) in enumerate(zip(starts, ends)):
+			x, y = X[start:end], Y[start:end]
+			self.n[sequence_i] = end - start
+			self.sums[:, sequence_i] = x.sum(), y.sum(), (x * y).sum(), (x * x).sum(), (y * y).sum()
+			self.min_x[sequence_i] = x.min()
+			self.max_x[sequence_i] = x.max()
+		self.alive[:len(starts)] = True
+		self.n_alive = len(starts)
+		self.exact_fits = {}
+
+	def alive_ids(self):
+		return np.flatnonzero(self.alive)
+
+	def merge(self, i, j):
+		new = len(self.members)
+		self.members.append(self.members[i] + self.members[j])
+		self.n[new] = self.n[i] + self.n[j]
+		self.sums[:, new] = self.sums[:, i] + self.sums[:, j]
+		self.min_x[new] = min(self.min_x[i], self.min_x[j])
+		self.max_x[new] = max(self.max_x[i], self.max_x[j])
+		self.alive[[i, j]] = False
+		self.alive[new] = True
+		self.n_alive -= 1
+		return new
+
+	def fit(self, I, J):
+		n = self.n[I] + self.n[J]
+		sx, sy, sxy, sxx, syy = self.sums[:, I] + self.sums[:, J]
+		Sxx = sxx - sx * sx / n
+		Sxy = sxy - sx * sy / n
+		Syy = syy - sy * sy / n
+		with np.errstate(divide='ignore', invalid='ignore'):
+			gradient = Sxy / Sxx
+			error = np.sqrt(np.maximum(Syy - gradient * Sxy, 0) / n)
+		return gradient, error
+
+	def exact_fit(self, i, j):
+		if (i, j) not in self.exact_fits:
+			candidate_XY = self.fixation_XY[self.members[i] + self.members[j]]
+			gradient, intercept = np.polyfit(candidate_XY[:, 0], candidate_XY[:, 1], 1)
+			residuals = candidate_XY[:, 1] - (gradient * candidate_XY[:, 0] + intercept)
+			error = np.sqrt(sum(residuals**2) / len(candidate_XY))
+			self.exact_fits[i, j] = (gradient, error)
+		return self.exact_fits[i, j]
+
+	def candidates(self, I, J, phase, g_thresh, e_thresh):
+		"""(error, i, j) of every pair of sequences that may merge in this phase."""
+		keep = (self.n[I] >= phase['min_i']) & (self.n[J] >= phase['min_j'])
+		I, J = I[keep], J[keep]
+		gradient, error = self.fit(I, J)
+		vertical = np.minimum(self.min_x[I], self.min_x[J]) == np.maximum(self.max_x[I], self.max_x[J])
+		if phase['no_constraints']:
+			keep = np.isfinite(error)
+			refit = vertical
+		else:
+			keep = (abs(gradient) < g_thresh) & (error < e_thresh)
+			refit = vertical | (abs(error - e_thresh) < _merge_tolerance(e_thresh)) | (abs(abs(gradient) - g_thresh) < 1e-9)
+		candidates = list(zip(error[keep & ~refit].tolist(), I[keep & ~refit].tolist(), J[keep & ~refit].tolist()))
+		for i, j in zip(I[refit].tolist(), J[refit].tolist()):
+			exact_gradient, exact_error = self.exact_fit(i, j)
+			if phase['no_constraints'] or (abs(exact_gradient) < g_thresh and exact_error < e_thresh):
+				if exact_error < np.inf:
+					candidates.append((exact_error, i, j))
+		return candidates
+
+	def pop_best(self, candidates):
+		"""Pop the pair the original nested loop would merge next."""
+		tied = []
+		while candidates:
+			error, i, j = candidates[0]
+			if tied and error > tied[0][0] + _merge_tolerance(tied[0][0]):
+				break
+			heapq.heappop(candidates)
+			if self.alive[i] and self.alive[j]:
+				tied.append((error, i, j))
+		if not tied:
+			return None
+		if len(tied) > 1:
+			best = min(tied, key=lambda candidate: (self.exact_fit(*candidate[1:])[1],) + candidate[1:])
+			for candidate in tied:
+				if candidate is not best:
+					heapq.heappush(candidates, candidate)
+			tied = [best]
+		return tied[0][1:]
+
+######################################################################
+# REGRESS
+#
+# Cohen, A. L. (2013). Software for the automatic correction of
+#   recorded eye fixation locations in reading experiments. Behavior
+#   Research Methods, 45(3), 679–683.
+#
+# https://doi.org/10.3758/s13428-012-0280-3
+# https://blogs.umass.edu/rdcl/resources/
+######################################################################
+
+# The log density of every fixation under every line is computed in one
+# broadcast over the n x m grid. With analytic_gradient=True the objective
+# also returns its gradient, so that minimize does not need finite
+# differences; it is faster, but the objective is only piecewise smooth and
+# the fit can end in a different (sometimes worse) optimum, so finite
+# differences stay the default. start_params=(k, o, s) warm-starts the fit,
+# for example with the parameters of a previous trial returned by
+# return_params=True.
+
+_LOG_SQRT_2PI = 0.5 * np.log(2 * np.pi)
+
+def regress(fixation_XY, line_Y, k_bounds=(-0.1, 0.1), o_bounds=(-50, 50), s_bounds=(1, 20), start_params=None, return_params=False, analytic_gradient=False):
+	# SciPy is imported on first use to keep importing the algorithms cheap
+	from scipy.optimize import minimize
+	from scipy.stats import norm
+	fixation_X = fixation_XY[:, 0].astype(float)[:, None]
+	fixation_Y = fixation_XY[:, 1].astype(float)[:, None]
+	line_Y = np.asarray(line_Y, dtype=float)
+	bounds = np.array([k_bounds, o_bounds, s_bounds], dtype=float)
+	lower, span = bounds[:, 0], bounds[:, 1] - bounds[:, 0]
+
+	def transform(params):
+		# map the unconstrained parameters into (k, o, s) within bounds
+		return lower + span * norm.cdf(params)
+
+	def log_density(k, o, s):
+		z = (fixation_Y - (fixation_X * k + line_Y + o)) / s
+		return -0.5 * z**2 - np.log(s) - _LOG_SQRT_2PI, z
+
+	def fit_lines(params, return_line_assignments=False):
+		k, o, s = transform(params)
+		if not analytic_gradient:
+			# the objective exactly as the line-by-line version computed it,
+			# since finite differences turn any rounding change into a
+			# different path through the parameter space
+			density = norm.logpdf(fixation_Y, fixation_X * k + (line_Y + o), s)
+			if return_line_assignments:
+				return density.argmax(axis=1)
+			return -sum(density.max(axis=1))
+		density, z = log_density(k, o, s)
+		if return_line_assignments:
+			return density.argmax(axis=1)
+		best_line = density.argmax(axis=1)
+		best_z = z[np.arange(len(z)), best_line]
+		# derivatives of -sum(max log density) with respect to k, o and s
+		gradient = -np.array([
+			np.sum(best_z * fixation_X[:, 0]) / s,
+			np.sum(best_z) / s,
+			np.sum(best_z**2 - 1) / s,
+		])
+		return -np.sum(density[np.arange(len(z)), best_line]), gradient * span * norm.pdf(params)
+
+	if start_params is None:
+		initial_params = np.zeros(3)
+	else:
+		fraction = (np.asarray(start_params, dtype=float) - lower) / span
+		initial_params = norm.ppf(np.clip(fraction, 1e-6, 1 - 1e-6))
+	best_fit = minimize(fit_lines, initial_params, jac=analytic_gradient)
+	line_assignments = fit_lines(best_fit.x, True)
+	fixation_XY[:, 1] = line_Y[line_assignments]
+	if return_params:
+		return fixation_XY, tuple(transform(best_fit.x))
+	return fixation_XY
+
+######################################################################
+# SEGMENT
+#
+# Abdulin, E. R., & Komogortsev, O. V. (2015). Person verification via
+#   eye movement-driven text reading model, In 2015 IEEE 7th
+#   International Conference on Biometrics Theory, Applications and
+#   Systems. IEEE.
+#
+# https://doi.org/10.1109/BTAS.2015.7358786
+######################################################################
+
+def segment(fixation_XY, line_Y):
+	n = len(fixation_XY)
+	m = len(line_Y)
+	diff_X = np.diff(fixation_XY[:, 0])
+	saccades_ordered_by_length = np.argsort(diff_X)
+	line_change_indices = saccades_ordered_by_length[:m-1]
+	current_line_i = 0
+	for fixation_i in range(n):
+		fixation_XY[fixation_i, 1] = line_Y[current_line_i]
+		if fixation_i in line_change_indices:
+			current_line_i += 1
+	return fixation_XY
+
+######################################################################
+# SLICE
+#
+# Glandorf, D., & Schroeder, S. (2021). Slice: An algorithm to assign
+#   fixations in multi-line texts. Procedia Computer Science, 192,
+#   2971–2979.
+#
+# https://doi.org/10.1016/j.procs.2021.09.069
+######################################################################
+
+# Proto lines are kept as x-sorted arrays, so the nearest proto-line
+# fixation of every fixation in a run is found with one np.searchsorted.
+# Run differences are cached per proto line and recomputed only after
+# that proto line (or its phantom) has changed.
+
+def slice(fixation_XY, line_Y, x_thresh=100, y_thresh=32, w_thresh=32, n_thresh=90):
+	n = len(fixation_XY)
+	line_height = np.mean(np.diff(line_Y))
+	proto_lines, phantom_proto_lines = {}, {}
+	run_differences = _RunDifferences(fixation_XY, proto_lines, phantom_proto_lines)
+	# 1. Segment runs
+	dist_X = abs(np.diff(fixation_XY[:, 0]))
+	dist_Y = abs(np.diff(fixation_XY[:, 1]))
+	end_run_indices = list(np.where(np.logical_or(dist_X > x_thresh, dist_Y > y_thresh))[0] + 1)
+	run_starts = [0] + end_run_indices
+	run_ends = end_run_indices + [n]
+	runs = [list(range(start, end)) for start, end in zip(run_starts, run_ends)]
+	run_ids = list(range(len(runs)))
+	# 2. Determine starting run
+	longest_run_i = np.argmax([fixation_XY[run[-1], 0] - fixation_XY[run[0], 0] for run in runs])
+	proto_lines[0] = runs.pop(longest_run_i)
+	run_ids.pop(longest_run_i)
+	# 3. Group runs into proto lines
+	while runs:
+		merger_on_this_iteration = False
+		for proto_line_i, direction in [(min(proto_lines), -1), (max(proto_lines), 1)]:
+			# Create new proto line above or below (depending on direction)
+			proto_lines[proto_line_i + direction] = []
+			run_differences.changed(proto_line_i + direction)
+			# Get current proto line XY coordinates (if proto line is empty, get phanton coordinates)
+			proto_line_XY = run_differences.proto_line_XY(proto_line_i)
+			# Compute differences between current proto line and all runs
+			differences = run_differences.get(proto_line_i, runs, run_ids)
+			# Find runs that can be merged into this proto line
+			merge_into_current = list(np.where(abs(differences) < w_thresh)[0])
+			# Find runs that can be merged into the adjacent proto line
+			merge_into_adjacent = list(np.where(np.logical_and(
+				differences * direction >= w_thresh,
+				differences * direction < n_thresh
+			))[0])
+			# Perform mergers
+			for index in merge_into_current:
+				proto_lines[proto_line_i].extend(runs[index])
+			for index in merge_into_adjacent:
+				proto_lines[proto_line_i + direction].extend(runs[index])
+			if merge_into_current:
+				run_differences.changed(proto_line_i)
+			if merge_into_adjacent:
+				run_differences.changed(proto_line_i + direction)
+			# If no, mergers to the adjacent, create phantom line for the adjacent
+			if not merge_into_adjacent:
+				average_x, average_y = np.mean(proto_line_XY, axis=0)
+				adjacent_y = average_y + line_height * direction
+				phantom_proto_lines[proto_line_i + direction] = np.array([[average_x, adjacent_y]])
+				run_differences.changed(proto_line_i + direction)
+			# Remove all runs that were merged on this iteration
+			for index in sorted(merge_into_current + merge_into_adjacent, reverse=True):
+				del runs[index], run_ids[index]
+				merger_on_this_iteration = True
+		# If no mergers were made, break the while loop
+		if not merger_on_this_iteration:
+			break
+	# 4. Assign any leftover runs to the closest proto lines
+	for run, run_id in zip(runs, run_ids):
+		best_pl_distance = np.inf
+		best_pl_assignemnt = None
+		for proto_line_i in proto_lines:
+			pl_distance = abs(run_differences.get(proto_line_i, [run], [run_id])[0])
+			if pl_distance < best_pl_distance:
+				best_pl_distance = pl_distance
+				best_pl_assignemnt = proto_line_i
+		proto_lines[best_pl_assignemnt].extend(run)
+		run_differences.changed(best_pl_assignemnt)
+	# 5. Prune proto lines
+	while len(proto_lines) > len(line_Y):
+		top, bot = min(proto_lines), max(proto_lines)
+		if len(proto_lines[top]) < len(proto_lines[bot]):
+			proto_lines[top + 1].extend(proto_lines[top])
+			del proto_lines[top]
+		else:
+			proto_lines[bot - 1].extend(proto_lines[bot])
+			del proto_lines[bot]
+	# 6. Map proto lines to text lines
+	for line_i, proto_line_i in enumerate(sorted(proto_lines)):
+		fixation_XY[proto_lines[proto_line_i], 1] = line_Y[line_i]
+	return fixation_XY
+
+class _RunDifferences:
+	"""Mean y difference between runs and the nearest (in x) fixations of
+	a proto line, cached until the proto line changes."""
+
+	def __init__(self, fixation_XY, proto_lines, phantom_proto_lines):
+		self.fixation_XY = fixation_XY
+		self.proto_lines = proto_lines
+		self.phantom_proto_lines = phantom_proto_lines
+		self.cache = {}
+
+	def changed(self, proto_line_i):
+		self.cache.pop(proto_line_i, None)
+
+	def proto_line_XY(self, proto_line_i):
+		if self.proto_lines[proto_line_i]:
+			return self.fixation_XY[self.proto_lines[proto_line_i]]
+		return self.phantom_proto_lines[proto_line_i]
+
+	def get(self, proto_line_i, runs, run_ids):
+		if proto_line_i not in self.cache:
+			proto_line_XY = self.proto_line_XY(proto_line_i)
+			self.cache[proto_line_i] = (proto_line_XY, *_sort_for_lookup(proto_line_XY[:, 0]), {})
+		proto_line_XY, sorted_X, order, differences = self.cache[proto_line_i]
+		missing = [(run, run_id) for run, run_id in zip(runs, run_ids) if run_id not in differences]
+		if missing:
+			# All missing runs in one lookup; np.add.reduceat sums in the same
+			# order as np.mean for runs shorter than numpy's pairwise block
+			lengths = np.array([len(run) for run, _ in missing])
+			starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+			run_XY = self.fixation_XY[np.concatenate([run for run, _ in missing])]
+			nearest = _nearest(sorted_X, order, run_XY[:, 0])
+			y_diffs = (run_XY[:, 1] - proto_line_XY[nearest, 1]).astype(float)
+			means = np.add.reduceat(y_diffs, starts) / lengths
+			for i, (start, length) in enumerate(zip(starts, lengths)):
+				if length >= 8:
+					means[i] = np.mean(y_diffs[start:start + length])
+			differences.update(zip([run_id for _, run_id in missing], means))
+		return np.array([differences[run_id] for run_id in run_ids])
+
+######################################################################
+# SPLIT
+#
+# Carr, J. W., Pescuma, V. N., Furlan, M., Ktori, M., & Crepaldi, D.
+#   (2021). Algorithms for the automated correction of vertical drift
+#   in eye-tracking data. Behavior Research Methods.
+#
+# https://doi.org/10.3758/s13428-021-01554-0
+# https://github.com/jwcarr/drift
+######################################################################
+
+# def split(fixation_XY, line_Y):
+# 	n = len(fixation_XY)
+# 	diff_X = np.diff(fixation_XY[:, 0])
+# 	clusters = KMeans(2, n_init=10, max_iter=300).fit_predict(diff_X.reshape(-1, 1))
+# 	centers = [diff_X[clusters == 0].mean(), diff_X[clusters == 1].mean()]
+# 	sweep_marker = np.argmin(centers)
+# 	end_line_indices = list(np.where(clusters == sweep_marker)[0] + 1)
+# 	end_line_indices.append(n)
+# 	start_of_line = 0
+# 	for end_of_line in end_line_indices:
+# 		mean_y = np.mean(fixation_XY[start_of_line:end_of_line, 1])
+# 		line_i = np.argmin(abs(line_Y - mean_y))
+# 		fixation_XY[start_of_line:end_of_line, 1] = line_Y[line_i]
+# 		start_of_line = end_of_line
+# 	return fixation_XY
+
+######################################################################
+# STRETCH
+#
+# Lohmeier, S. (2015). Experimental evaluation and modelling of the
+#   comprehension of indirect anaphors in a programming language
+#   (Master’s thesis). Technische Universität Berlin.
+#
+# http://www.monochromata.de/master_thesis/ma1.3.pdf
+######################################################################
+
+# The nearest line of every candidate y is found with one np.searchsorted
+# over the sorted line_Y, so each evaluation of the objective is a few
+# array passes. grid_size evaluates the objective on a coarse grid over
+# the (scale, offset) bounds and starts minimize from its best point.
+
+def stretch(fixation_XY, line_Y, scale_bounds=(0.9, 1.1), offset_bounds=(-50, 50), grid_size=None):
+	from scipy.optimize import minimize
+	line_Y = np.asarray(line_Y)
+	fixation_Y = fixation_XY[:, 1]
+	sorted_line_Y, line_order = _sort_for_lookup(line_Y)
+
+	def fit_lines(params, return_correction=False):
+		candidate_Y = fixation_Y * params[0] + params[1]
+		corrected_Y = line_Y[_nearest(sorted_line_Y, line_order, candidate_Y)]
+		if return_correction:
+			return corrected_Y
+		# summed left to right like the builtin sum, which keeps the
+		# optimizer on the same path as the per-fixation loop did
+		return np.cumsum(abs(candidate_Y - corrected_Y), axis=-1)[..., -1]
+
+	initial_params = [1, 0]
+	if grid_size:
+		scales, offsets = np.meshgrid(np.linspace(*scale_bounds, grid_size), np.linspace(*offset_bounds, grid_size))
+		grid_costs = fit_lines((scales.reshape(-1, 1), offsets.reshape(-1, 1)))
+		best_i = np.argmin(grid_costs)
+		initial_params = [scales.flat[best_i], offsets.flat[best_i]]
+	best_fit = minimize(fit_lines, initial_params, bounds=[scale_bounds, offset_bounds])
+	fixation_XY[:, 1] = fit_lines(best_fit.x, return_correction=True)
+	return fixation_XY
+
+######################################################################
+# WARP
+#
+# Carr, J. W., Pescuma, V. N., Furlan, M., Ktori, M., & Crepaldi, D.
+#   (2021). Algorithms for the automated correction of vertical drift
+#   in eye-tracking data. Behavior Research Methods.
+#
+# https://doi.org/10.3758/s13428-021-01554-0
+# https://github.com/jwcarr/drift
+######################################################################
+
+def warp(fixation_XY, word_XY):
+	_, dtw_path = dynamic_time_warping(fixation_XY, word_XY)
+	for fixation_i, words_mapped_to_fixation_i in enumerate(dtw_path):
+		candidate_Y = word_XY[words_mapped_to_fixation_i, 1]
+		fixation_XY[fixation_i, 1] = mode(candidate_Y)
+	return fixation_XY
+
+def mode(values):
+	values = list(values)
+	return max(set(values), key=values.count)
+
+######################################################################
+# Dynamic Time Warping adapted from https://github.com/talcs/simpledtw
+# This is used by the COMPARE and WARP algorithms
+#
+# The cost matrix is filled one anti-diagonal at a time: every cell on
+# diagonal i+j depends only on diagonals i+j-1 and i+j-2, so each
+# diagonal is updated with a single vectorized step. Only the last two
+# diagonals of accumulated cost are kept in memory, together with a
+# one-byte backpointer per visited cell that is used to recover the path.
+#
+# An optional global constraint restricts the cells that can be visited:
+# window gives the radius of a Sakoe-Chiba band around the diagonal and
+# max_slope the steepest slope of an Itakura parallelogram. The band is
+# kept as one column range per row, and each diagonal only computes the
+# local and accumulated costs of its cells inside the band, so a narrow
+# band saves time and memory in proportion to its width. When the
+# constraint leaves no valid path, the unconstrained alignment is used.
+######################################################################
+
+# backpointer codes, in the order ties are broken during traceback
+_DIAGONAL, _UP, _LEFT = 0, 1, 2
+
+def dynamic_time_warping(sequence1, sequence2, window=None, max_slope=None):
+	sequence1 = np.asarray(sequence1)
+	sequence2 = np.asarray(sequence2)
+	if sequence1.ndim == 1:
+		sequence1 = sequence1[:, None]
+	if sequence2.ndim == 1:
+		sequence2 = sequence2[:, None]
+	n1 = len(sequence1)
+	n2 = len(sequence2)
+	band = _dtw_band(n1, n2, window, max_slope)
+	dtw_cost, backpointers = _dtw_wavefront(sequence1, sequence2, band)
+	if band is not None and np.isinf(dtw_cost):
+		dtw_cost, backpointers = _dtw_wavefront(sequence1, sequence2, None)
+	i, j = n1 - 1, n2 - 1
+	dtw_path = [[] for _ in range(n1)]
+	while i > 0 or j > 0:
+		dtw_path[i].append(j)
+		first_row, moves = backpointers[i + j]
+		best_move = moves[i - first_row]
+		if best_move == _DIAGONAL:
+			i -= 1
+			j -= 1
+		elif best_move == _UP:
+			i -= 1
+		else:
+			j -= 1
+	dtw_path[0].append(0)
+	return dtw_cost, dtw_path
+
+def _dtw_wavefront(sequence1, sequence2, band=None):
+	# returns the cost and, for every anti-diagonal i+j of the unpadded
+	# matrix, (first row, backpointers of its visited cells)
+	n1, n2 = len(sequence1), len(sequence2)
+	if band is None:
+		# every cell is visited, the local costs are computed at once
+		all_local_costs = np.sqrt(((sequence1[:, None, :] - sequence2[None, :, :])**2).sum(axis=2))
+	else:
+		low, high = band
+		if np.any(low > high):
+			# a row without cells: no path fits in the band
+			return np.inf, None
+		row_ids = np.arange(n1)
+		# the rows of diagonal i+j = k that can be in the band lie between
+		# the first row whose range reaches k and the last row whose range
+		# starts at or before k
+		reaches = np.maximum.accumulate(row_ids + high)
+		starts = np.minimum.accumulate((row_ids + low)[::-1])[::-1]
+	backpointers = [None] * (n1 + n2 - 1)
+	# accumulated cost of the previous two anti-diagonals of the padded
+	# (n1+1)x(n2+1) matrix, indexed by padded row, and of the current one;
+	# the buffers are reused, and are inf outside the rows written last
+	before_previous = np.full(n1 + 1, np.inf)
+	before_previous[0] = 0
+	previous = np.full(n1 + 1, np.inf)
+	current = np.full(n1 + 1, np.inf)
+	# the padded rows last written to each buffer, as (start, stop)
+	before_previous_rows, previous_rows, current_rows = (0, 1), (0, 0), (0, 0)
+	for diagonal in range(n1 + n2 - 1):
+		first_row = max(diagonal - n2 + 1, 0)
+		last_row = min(diagonal, n1 - 1)
+		if band is not None:
+			first_row = max(int(np.searchsorted(reaches, diagonal, side="left")), first_row)
+			last_row = min(int(np.searchsorted(starts, diagonal, side="right")) - 1, last_row)
+		current[current_rows[0]:current_rows[1]] = np.inf
+		current_rows = (first_row + 1, max(last_row + 2, first_row + 1))
+		if first_row <= last_row:
+			rows = np.arange(first_row, last_row + 1)
+			cols = diagonal - rows
+			moves = np.stack((
+				before_previous[rows], # diagonal: (i-1, j-1)
+				previous[rows],        # up: (i-1, j)
+				previous[rows + 1],    # left: (i, j-1)
+			))
+			best_move = moves.argmin(axis=0)
+			if band is None:
+				cell_cost = all_local_costs[rows, cols] + moves[best_move, np.arange(len(rows))]
+			else:
+				local_cost = np.sqrt(((sequence1[rows] - sequence2[cols])**2).sum(axis=1))
+				cell_cost = local_cost + moves[best_move, np.arange(len(rows))]
+				cell_cost[(cols < low[rows]) | (cols > high[rows])] = np.inf
+			current[rows + 1] = cell_cost
+			backpointers[diagonal] = (first_row, best_move.astype(np.uint8))
+		else:
+			backpointers[diagonal] = (first_row, np.zeros(0, dtype=np.uint8))
+		before_previous, previous, current = previous, current, before_previous
+		before_previous_rows, previous_rows, current_rows = previous_rows, current_rows, before_previous_rows
+	return previous[n1], backpointers
+
+def _dtw_costs(sequences1, sequences2):
+	# unconstrained DTW cost of each pair (sequences1[b], sequences2[b]) in
+	# one wavefront over a batch axis; the sequences are padded to common
+	# lengths, which leaves the cost of each pair at (n1_b, n2_b) unchanged
+	batch = len(sequences1)
+	lengths1 = np.array([len(sequence1) for sequence1 in sequences1])
+	lengths2 = np.array([len(sequence2) for sequence2 in sequences2])
+	n1, n2 = lengths1.max(), lengths2.max()
+	dimensions = sequences1[0].shape[1]
+	padded1 = np.zeros((batch, n1, dimensions))
+	padded2 = np.zeros((batch, n2, dimensions))
+	for b in range(batch):
+		padded1[b, :lengths1[b]] = sequences1[b]
+		padded2[b, :lengths2[b]] = sequences2[b]
+	local_cost = np.sqrt(((padded1[:, :, None, :] - padded2[:, None, :, :])**2).sum(axis=3))
+	costs = np.empty(batch)
+	before_previous = np.full((batch, n1 + 1), np.inf)
+	before_previous[:, 0] = 0
+	previous = np.full((batch, n1 + 1), np.inf)
+	for diagonal in range(2, n1 + n2 + 1):
+		first_row = max(1, diagonal - n2)
+		last_row = min(n1, diagonal - 1)
+		rows = np.arange(first_row, last_row + 1)
+		cols = diagonal - rows
+		best = np.minimum(np.minimum(before_previous[:, rows - 1], previous[:, rows - 1]), previous[:, rows])
+		current = np.full((batch, n1 + 1), np.inf)
+		current[:, rows] = local_cost[:, rows - 1, cols - 1] + best
+		finished = np.where(lengths1 + lengths2 == diagonal)[0]
+		costs[finished] = current[finished, lengths1[finished]]
+		before_previous, previous = previous, current
+	return costs
+
+def _dtw_band(n1, n2, window=None, max_slope=None):
+	# (first, last) column of the band in every row, or None without a
+	# constraint; a row without cells has first > last
+	if window is None and max_slope is None:
+		return None
+	radius = None
+	if window is not None:
+		# the radius is widened so that consecutive rows of the band
+		# always overlap when the sequences differ in length
+		radius = max(window, int(np.ceil(max(n1, n2) / min(n1, n2))))
+
+	def in_band(row, col):
+		rows = row / max(n1 - 1, 1)
+		cols = col / max(n2 - 1, 1)
+		inside = np.ones(np.broadcast(rows, cols).shape, dtype=bool)
+		if radius is not None:
+			inside &= abs(cols - rows) * (n2 - 1) <= radius
+		if max_slope is not None:
+			inside &= (cols <= rows * max_slope) & (rows <= cols * max_slope)
+			inside &= (1 - cols <= (1 - rows) * max_slope) & (1 - rows <= (1 - cols) * max_slope)
+		return inside
+
+	# every constraint is monotone in the column, so the band is one range
+	# of columns per row; it is found by bisection on both sides of the
+	# diagonal, or by testing the whole row if the diagonal is outside it
+	row_ids = np.arange(n1)
+	middle = np.round(row_ids * (n2 - 1) / max(n1 - 1, 1)).astype(int)
+	low = np.full(n1, n2)
+	high = np.full(n1, -1)
+	centered = in_band(row_ids, middle)
+	for row in np.flatnonzero(~centered):
+		columns = np.flatnonzero(in_band(row, np.arange(n2)))
+		if len(columns):
+			low[row], high[row] = columns[0], columns[-1]
+	rows = row_ids[centered]
+	# low: the first column in the band in [0, middle]
+	outside, inside = np.full(len(rows), -1), middle[centered]
+	while np.any(inside - outside > 1):
+		probe = (outside + inside) // 2
+		hit = in_band(rows, probe)
+		inside = np.where(hit, probe, inside)
+		outside = np.where(hit, outside, probe)
+	low[rows] = inside
+	# high: the last column in the band in [middle, n2 - 1]
+	inside, outside = middle[centered], np.full(len(rows), n2)
+	while np.any(outside - inside > 1):
+		probe = (outside + inside) // 2
+		hit = in_band(rows, probe)
+		inside = np.where(hit, probe, inside)
+		outside = np.where(hit, outside, probe)
+	high[rows] = inside
+	return low, high
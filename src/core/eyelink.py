@@ -0,0 +1,246 @@
+"""
+Streaming parser for EyeLink 1000 .asc files.
+
+The end-of-event lines (EFIX, ESACC, EBLINK) are appended to typed column
+buffers as the file is read line by line, and a DataFrame is built from the
+buffers once per trial, per file, or every chunk_rows events. Sample lines,
+the vast majority of an .asc file, are skipped without being split.
+
+The columns and values are those the original row-by-row parser in
+mini_emtk produced, including one of its quirks: depending on the order in
+which the event types first appear, DataFrame.append left pupil and
+peak_velocity as integers or turned them into floats (400 or 400.0 in the
+CSV). integer_columns() decides from the first fixation or saccade.
+
+A session holds many trials. trial_offsets() finds the TRIALID lines with a
+scan of the memory-mapped file, without decoding it, and parse_trials()
+parses the trials between them in a process pool. The trials come back in
+file order, so merging them gives the table of the whole file.
+"""
+
+import io
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .lazy import lazy_import
+
+# loaded on first use, see fix8.core
+pd = lazy_import("pandas")
+
+
+HEADER = ["time_stamp", "eye_event", "x_cord", "y_cord", "duration", "pupil",
+          "x1_cord", "y1_cord", "amplitude", "peak_velocity"]
+
+FIXATION, SACCADE, BLINK = 0, 1, 2
+EVENTS = ["fixation", "saccade", "blink"]
+
+_EVENT_CODES = {"EFIX": FIXATION, "ESACC": SACCADE, "EBLINK": BLINK}
+
+
+def _coordinate(token):
+    return float(token) if token != '.' else 0.0
+
+
+# the integer column an event type fills in; fixations have a pupil size
+# and saccades a peak velocity, blinks have neither
+_INTEGER_COLUMN = {FIXATION: "pupil", SACCADE: "peak_velocity"}
+
+
+def integer_columns(event_order):
+    """Which of pupil and peak_velocity the original parser kept as integers.
+
+    event_order lists the event types in the order of their first
+    appearance. The first fixation or saccade appended to the table gave its
+    column an integer type and left the other one all NaN, and thus float,
+    so every value appended to that one later became a float. Columns that
+    only ever held NaN (a table of blinks) stayed untyped, which is written
+    like an empty integer column.
+    """
+    for event in event_order:
+        if event in _INTEGER_COLUMN:
+            return [_INTEGER_COLUMN[event]]
+    return ["pupil", "peak_velocity"]
+
+
+class EventColumns:
+    """Typed buffers of the parsed events, one per column of HEADER."""
+
+    def __init__(self):
+        # event types in the order they first appeared
+        self.event_order = []
+        self.clear()
+
+    def clear(self, new_table=False):
+        """Empty the buffers; with new_table, the next events start another table."""
+        if new_table:
+            self.event_order = []
+        self.time_stamp = array("q")
+        self.eye_event = array("b")
+        self.duration = array("q")
+        # the float columns are NaN where an event has no value
+        self.floats = {name: array("d") for name in ("x_cord", "y_cord", "pupil", "x1_cord", "y1_cord",
+                                                      "amplitude", "peak_velocity")}
+
+    def __len__(self):
+        return len(self.time_stamp)
+
+    def add(self, token):
+        """Parse the tokens of an EFIX, ESACC or EBLINK line; returns False for any other line."""
+        code = _EVENT_CODES.get(token[0])
+        if code is None:
+            return False
+
+        nan = np.nan
+        if code == FIXATION:
+            values = (float(token[5]), float(token[6]), int(token[7]), nan, nan, nan, nan)
+        elif code == SACCADE:
+            values = (_coordinate(token[5]), _coordinate(token[6]), nan, _coordinate(token[7]),
+                      _coordinate(token[8]), float(token[9]), int(token[10]))
+        else:
+            values = (nan,) * 7
+
+        if code not in self.event_order:
+            self.event_order.append(code)
+        self.time_stamp.append(int(token[2]))
+        self.duration.append(int(token[4]))
+        self.eye_event.append(code)
+        for column, value in zip(self.floats.values(), values):
+            column.append(value)
+        return True
+
+    def extend(self, other):
+        """Append the events of other, parsed from the lines after ours."""
+        for code in other.event_order:
+            if code not in self.event_order:
+                self.event_order.append(code)
+        self.time_stamp.extend(other.time_stamp)
+        self.eye_event.extend(other.eye_event)
+        self.duration.extend(other.duration)
+        for name, column in self.floats.items():
+            column.extend(other.floats[name])
+
+    def frame(self, start=0):
+        """The buffered events as a DataFrame whose index starts at start."""
+        columns = {
+            "time_stamp": np.frombuffer(self.time_stamp, dtype=np.int64).copy(),
+            "eye_event": pd.Categorical.from_codes(np.frombuffer(self.eye_event, dtype=np.int8), categories=EVENTS),
+            "duration": np.frombuffer(self.duration, dtype=np.int64).copy(),
+        }
+        for name, values in self.floats.items():
+            columns[name] = np.frombuffer(values, dtype=np.float64).copy()
+        for name in integer_columns(self.event_order):
+            columns[name] = pd.array(columns[name], dtype="Int64")
+        index = pd.RangeIndex(start, start + len(self))
+        return pd.DataFrame(columns, index=index, columns=HEADER)
+
+
+def tokens(asc_file):
+    """Split the lines of an open .asc file that are events or TRIALID/DISPLAY_COORDS messages.
+
+    Sample lines start with a digit and are not split at all.
+    """
+    for line in asc_file:
+        if line[:1] in "E \t" or "TRIALID" in line or "DISPLAY_COORDS" in line:
+            token = line.split()
+            if token:
+                yield token
+
+
+def iter_events(filename, chunk_rows=100000):
+    """Yield the events of an .asc file as DataFrames of up to chunk_rows rows.
+
+    The chunks continue each other's index, and written one after the other
+    to a CSV they give the same file as the whole table would.
+    """
+    columns = EventColumns()
+    start = 0
+    with open(filename) as asc_file:
+        for token in tokens(asc_file):
+            if columns.add(token) and len(columns) >= chunk_rows:
+                yield columns.frame(start)
+                start += len(columns)
+                columns.clear()
+    if len(columns) or start == 0:
+        yield columns.frame(start)
+
+
+def trialid_lines(data):
+    """(byte offset, tokens) of the lines of .asc data (bytes or mmap) that have a TRIALID token."""
+    lines = []
+    position = data.find(b"TRIALID")
+    while position != -1:
+        start = data.rfind(b"\n", 0, position) + 1
+        end = data.find(b"\n", position)
+        if end == -1:
+            end = len(data)
+        token = data[start:end].split()
+        if b"TRIALID" in token:
+            lines.append((start, token))
+        position = data.find(b"TRIALID", end)
+    return lines
+
+
+def trial_offsets(filename):
+    """Byte offsets of the lines of an .asc file that have a TRIALID token, in file order."""
+    with open(filename, "rb") as asc_file:
+        if os.fstat(asc_file.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(asc_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return [start for start, _ in trialid_lines(data)]
+
+
+def trial_ranges(filename):
+    """(start, end) byte ranges of the trials of an .asc file.
+
+    A trial runs from its TRIALID line to the next one; the lines before the
+    first TRIALID belong to the first trial. A file without TRIALID is one
+    range.
+    """
+    bounds = [0] + trial_offsets(filename)[1:] + [os.path.getsize(filename)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_range(job):
+    """Parse the lines of one byte range of an .asc file; runs in a worker process.
+
+    job is (filename, start, end). Returns (events, trial id, display size):
+    the EventColumns of the range, the value of its first TRIALID (-1 if it
+    has none) and the (width, height) of its last DISPLAY_COORDS (None if it
+    has none).
+    """
+    filename, start, end = job
+    with open(filename, "rb") as asc_file:
+        asc_file.seek(start)
+        data = asc_file.read(end - start)
+
+    columns = EventColumns()
+    trial_id = -1
+    display = None
+    # decoded like open(filename) would
+    for token in tokens(io.TextIOWrapper(io.BytesIO(data))):
+        if columns.add(token):
+            continue
+        if "DISPLAY_COORDS" in token:
+            display = int(token[-2]), int(token[-1])
+        if "TRIALID" in token and trial_id == -1:
+            trial_id = int(token[-1])
+    return columns, trial_id, display
+
+
+def parse_trials(filename, jobs=1):
+    """Parse the trials of an .asc file with jobs worker processes.
+
+    jobs=None uses a process per CPU, and jobs=1 parses in this process.
+    Yields the parse_range() result of every range of trial_ranges() in
+    file order, each as soon as it and the ones before it are parsed.
+    """
+    ranges = [(filename, start, end) for start, end in trial_ranges(filename)]
+    if (jobs is not None and jobs <= 1) or len(ranges) == 1:
+        yield from map(parse_range, ranges)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(parse_range, ranges)
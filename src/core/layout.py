@@ -0,0 +1,250 @@
+"""
+Line and word geometry of a stimulus as NumPy arrays.
+
+A StimulusLayout is built once from an AOI table (as returned by
+mini_emtk.EMTK_find_aoi) and answers the questions the GUI, the algorithms
+and the metrics keep asking of it -- which lines are there, where are the
+words, which line or word is a point on -- with array lookups instead of
+iterating over the DataFrame.
+"""
+
+import numpy as np
+
+
+def first_occurrences(values):
+    """Indices of the first occurrence of every distinct row (or value) of values, in order."""
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=int)
+    _, first = np.unique(values, axis=0, return_index=True)
+    return np.sort(first)
+
+
+def aoi_line_centers(aoi):
+    """y + height / 2 of every AOI, in table order."""
+    return np.asarray(aoi["y"], dtype=float) + np.asarray(aoi["height"], dtype=float) / 2
+
+
+def aoi_word_centers(aoi):
+    """(int(x + width // 2), int(y + height // 2)) of every AOI, in table order, as n x 2 int array."""
+    x = np.asarray(aoi["x"], dtype=float)
+    y = np.asarray(aoi["y"], dtype=float)
+    width = np.asarray(aoi["width"], dtype=float)
+    height = np.asarray(aoi["height"], dtype=float)
+    centers = np.column_stack((x + width // 2, y + height // 2))
+    # astype truncates towards zero, like int()
+    return centers.astype(np.int64)
+
+
+def _name_numbers(names, word):
+    # "line 3 part 2" -> 3 for word "line", 2 for word "part"; 0 if absent
+    numbers = np.zeros(len(names), dtype=int)
+    for i, name in enumerate(names):
+        parts = str(name).split(" ")
+        if word in parts[:-1]:
+            numbers[i] = int(parts[parts.index(word) + 1])
+    return numbers
+
+
+class StimulusLayout:
+    """Arrays describing the AOIs of one stimulus.
+
+    Parameters
+    ----------
+    aoi : pandas.DataFrame
+        AOIs with columns x, y, width, height and name ("line L part P")
+
+    Attributes
+    ----------
+    x0, y0, x1, y1 : numpy.ndarray
+        the AOI boxes, x1 = x + width and y1 = y + height, in table order
+    line_ids, part_ids : numpy.ndarray
+        line and part number of every AOI, parsed from its name
+    line_Y : numpy.ndarray
+        the distinct line centers (y + height / 2), sorted
+    word_XY : numpy.ndarray
+        the distinct word centers (int(x + width // 2), int(y + height // 2))
+        in reading (table) order, as n x 2 int array
+    centers_Y : numpy.ndarray
+        y + height / 2 of every AOI
+    aoi_line : numpy.ndarray
+        index into line_Y of the line of every AOI
+    """
+
+    def __init__(self, aoi):
+        self.aoi = aoi
+        x = np.asarray(aoi["x"], dtype=float)
+        y = np.asarray(aoi["y"], dtype=float)
+        width = np.asarray(aoi["width"], dtype=float)
+        height = np.asarray(aoi["height"], dtype=float)
+
+        self.x0, self.y0 = x, y
+        self.x1, self.y1 = x + width, y + height
+
+        names = aoi["name"].tolist() if "name" in aoi.columns else [""] * len(aoi)
+        self.line_ids = _name_numbers(names, "line")
+        self.part_ids = _name_numbers(names, "part")
+
+        self.centers_Y = aoi_line_centers(aoi)
+        self.line_Y = np.unique(self.centers_Y)
+        self.aoi_line = np.searchsorted(self.line_Y, self.centers_Y)
+
+        centers = aoi_word_centers(aoi)
+        self.word_XY = centers[first_occurrences(centers)]
+
+        self._build_word_index()
+
+    def __len__(self):
+        return len(self.x0)
+
+    def lines_in_table_order(self):
+        """The distinct line centers in the order they first appear in the table."""
+        return self.centers_Y[first_occurrences(self.centers_Y)]
+
+    def _build_word_index(self):
+        # boxes grouped by line band (y0, y1) and sorted by x0 within a band;
+        # a single composite key turns "band, then x" into one sorted array
+        bands, band_of_box = np.unique(np.column_stack((self.y0, self.y1)), axis=0, return_inverse=True)
+        band_of_box = band_of_box.reshape(-1)
+        self._band_y0, self._band_y1 = bands[:, 0], bands[:, 1]
+        # the line number of the first AOI (in table order) of every band
+        first_of_band = np.full(len(bands), len(self.x0))
+        np.minimum.at(first_of_band, band_of_box, np.arange(len(self.x0)))
+        self._band_line = self.line_ids[first_of_band] if len(self.x0) else np.zeros(0, dtype=int)
+        if len(self.x0):
+            self._x_offset = self.x0.min()
+            self._band_span = self.x1.max() - self._x_offset + 1
+        else:
+            self._x_offset, self._band_span = 0.0, 1.0
+        keys = band_of_box * self._band_span + (self.x0 - self._x_offset)
+        self._word_order = np.lexsort((np.arange(len(keys)), keys))
+        self._word_keys = keys[self._word_order]
+
+    def line_at(self, y):
+        """Line number (from the AOI names) of the line whose rows strictly contain y, or -1.
+
+        Assumes the lines do not overlap vertically, as for AOIs found by
+        EMTK_find_aoi.
+        """
+        y = np.asarray(y, dtype=float)
+        if len(self.x0) == 0:
+            result = np.full(y.shape, -1)
+            return result if result.ndim else int(result)
+        band = np.searchsorted(self._band_y0, y, side="left") - 1
+        inside = (band >= 0) & (y < self._band_y1[np.maximum(band, 0)])
+        result = np.where(inside, self._band_line[np.maximum(band, 0)], -1)
+        return result if result.ndim else int(result)
+
+    def line_above(self, y):
+        """y of the closest line above y, or of the first line if there is none."""
+        index = np.searchsorted(self.line_Y, y, side="left") - 1
+        return self.line_Y[index] if index >= 0 else self.line_Y[0]
+
+    def line_below(self, y):
+        """y of the closest line below y, or of the last line if there is none."""
+        index = np.searchsorted(self.line_Y, y, side="right")
+        return self.line_Y[index] if index < len(self.line_Y) else self.line_Y[-1]
+
+    def word_at(self, x, y):
+        """Row index of the AOI containing the point (bounds included), or -1.
+
+        Assumes the lines do not overlap vertically and the words of a line
+        do not overlap, as for AOIs found by EMTK_find_aoi.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        result = np.full(np.broadcast(x, y).shape, -1)
+        if len(self.x0) == 0:
+            return result if result.ndim else int(result)
+
+        band = np.searchsorted(self._band_y0, y, side="right") - 1
+        in_band = (band >= 0) & (y <= self._band_y1[np.maximum(band, 0)])
+        keys = np.maximum(band, 0) * self._band_span + (x - self._x_offset)
+        position = np.searchsorted(self._word_keys, keys, side="right") - 1
+        box = self._word_order[np.maximum(position, 0)]
+        hit = (in_band & (position >= 0) & (self.y0[box] <= y) & (y <= self.y1[box])
+               & (self.x0[box] <= x) & (x <= self.x1[box]))
+        result = np.where(hit, box, -1)
+        return result if result.ndim else int(result)
+
+
+class BoxGrid:
+    """Uniform grid over boxes that may overlap, answering "which is the first
+    box (in the given order) containing this point" for many points at once.
+
+    Every box is registered in the cells it covers, so a point is only tested
+    against the few boxes of its cell.
+
+    Parameters
+    ----------
+    x0, y0, x1, y1 : array-like
+        the box edges; a point (x, y) is in a box if x0 <= x <= x1 and y0 <= y <= y1
+    max_cells : int, optional
+        the cells are enlarged until the grid has at most this many
+    """
+
+    def __init__(self, x0, y0, x1, y1, max_cells=1 << 20):
+        self.x0, self.y0 = np.asarray(x0, dtype=float), np.asarray(y0, dtype=float)
+        self.x1, self.y1 = np.asarray(x1, dtype=float), np.asarray(y1, dtype=float)
+        n_boxes = len(self.x0)
+        if n_boxes == 0:
+            self.columns = self.rows = 0
+            self.cells = np.zeros((0, 0), dtype=int)
+            return
+
+        self.origin_x, self.origin_y = self.x0.min(), self.y0.min()
+        # cells about the size of a typical box
+        self.cell_width = max(float(np.median(self.x1 - self.x0)), 1.0)
+        self.cell_height = max(float(np.median(self.y1 - self.y0)), 1.0)
+        while True:
+            column0, row0 = self._cell(self.x0, self.y0)
+            column1, row1 = self._cell(self.x1, self.y1)
+            self.columns, self.rows = int(column1.max()) + 1, int(row1.max()) + 1
+            n_columns, n_rows = column1 - column0 + 1, row1 - row0 + 1
+            if self.columns * self.rows <= max_cells and (n_columns * n_rows).sum() <= max_cells:
+                break
+            self.cell_width *= 2
+            self.cell_height *= 2
+
+        # one (cell, box) pair per cell a box covers
+        counts = n_columns * n_rows
+        box = np.repeat(np.arange(n_boxes), counts)
+        k = np.arange(len(box)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell = (row0[box] + k // n_columns[box]) * self.columns + column0[box] + k % n_columns[box]
+
+        # boxes of a cell in their original order, padded with -1
+        order = np.lexsort((box, cell))
+        cell, box = cell[order], box[order]
+        n_cells = self.columns * self.rows
+        per_cell = np.bincount(cell, minlength=n_cells)
+        first_of_cell = np.cumsum(per_cell) - per_cell
+        self.cells = np.full((n_cells, per_cell.max()), -1)
+        self.cells[cell, np.arange(len(cell)) - first_of_cell[cell]] = box
+
+    def _cell(self, x, y):
+        column = np.floor((x - self.origin_x) / self.cell_width).astype(int)
+        row = np.floor((y - self.origin_y) / self.cell_height).astype(int)
+        return column, row
+
+    def first_containing(self, x, y):
+        """Index of the first box containing each point, or -1."""
+        x = np.asarray(x, dtype=float).reshape(-1)
+        y = np.asarray(y, dtype=float).reshape(-1)
+        result = np.full(len(x), -1)
+        if self.columns == 0 or len(x) == 0:
+            return result
+
+        with np.errstate(invalid="ignore"):
+            column = np.floor((x - self.origin_x) / self.cell_width)
+            row = np.floor((y - self.origin_y) / self.cell_height)
+            on_grid = (column >= 0) & (column < self.columns) & (row >= 0) & (row < self.rows)
+        points = np.nonzero(on_grid)[0]
+        candidates = self.cells[row[points].astype(int) * self.columns + column[points].astype(int)]
+
+        box = np.maximum(candidates, 0)
+        px, py = x[points, None], y[points, None]
+        inside = ((candidates >= 0) & (self.x0[box] <= px) & (px <= self.x1[box])
+                  & (self.y0[box] <= py) & (py <= self.y1[box]))
+        hit = inside.any(axis=1)
+        result[points[hit]] = candidates[hit, inside[hit].argmax(axis=1)]
+        return result
@@ -0,0 +1,36 @@
+"""
+Deferred imports for the heavy optional parts of the scientific stack.
+"""
+
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Return module name, deferring its execution until an attribute is used.
+
+    The module is registered in sys.modules right away, so a later plain
+    import of the same name returns the same (by then loaded) module.
+    Importing a submodule (e.g. "PIL.Image") imports its parent package
+    immediately, so this is only worthwhile for cheap parents.
+
+    Parameters
+    ----------
+    name : str
+        absolute name of the module, e.g. "pandas"
+
+    Returns
+    -------
+    module
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError("No module named " + repr(name), name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
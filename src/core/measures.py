@@ -0,0 +1,161 @@
+"""
+Reading measures of every AOI of a trial, in one pass over its hits.
+
+The mini_emtk.get_* functions compute one measure of one AOI by filtering
+the whole hit test table. aoi_measures() computes all of them for all AOIs
+at once. The hits are numbered by AOI in reading order (line, then part),
+and a few per-hit sequences are derived from that numbering once:
+
+- the passes, i.e. runs of consecutive hits on the same AOI;
+- the transitions from one AOI to another, to find regressions;
+- the furthest AOI read so far, to find skips and the end of go-past.
+
+Every measure is then a group-by or lookup over those sequences, so adding
+a measure does not add another scan of the hits.
+"""
+
+import numpy as np
+
+from .layout import StimulusLayout
+from .lazy import lazy_import
+
+# loaded on first use, see fix8.core
+pd = lazy_import("pandas")
+
+
+SINGLE_FIXATION_DURATION = "Single Fixation Duration"
+FIRST_FIXATION_DURATION = "First Fixation Duration"
+GAZE_DURATION = "Gaze Duration"
+TOTAL_TIME = "Total Time"
+FIXATION_COUNT = "Fixation Count"
+GO_PAST_DURATION = "Go-Past Duration"
+SECOND_PASS_TIME = "Second-Pass Time"
+SKIPPED = "Skipped"
+REGRESSIONS_IN = "Regressions In"
+REGRESSIONS_OUT = "Regressions Out"
+LANDING_POSITION = "Landing Position"
+
+MEASURES = [
+    SINGLE_FIXATION_DURATION,
+    FIRST_FIXATION_DURATION,
+    GAZE_DURATION,
+    TOTAL_TIME,
+    FIXATION_COUNT,
+    GO_PAST_DURATION,
+    SECOND_PASS_TIME,
+    SKIPPED,
+    REGRESSIONS_IN,
+    REGRESSIONS_OUT,
+    LANDING_POSITION,
+]
+
+
+def aoi_measures(hit_test_output, aoi, layout=None):
+    """Reading measures of every AOI.
+
+    Parameters
+    ----------
+    hit_test_output : pandas.DataFrame
+        the hits of a trial in fixation order, as returned by mini_emtk.hit_test
+    aoi : pandas.DataFrame
+        AOIs named "line L part P", as returned by mini_emtk.EMTK_find_aoi
+    layout : layout.StimulusLayout, optional
+        the layout of aoi, if one was already built
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per AOI with the same index as aoi (so aoi.join() adds the
+        measures to it) and the MEASURES columns. The first five have the
+        same values as the mini_emtk.get_* functions: durations are NaN for
+        AOIs that were not fixated, and single fixation duration is NaN
+        unless the AOI was fixated exactly once. The others are:
+
+        - Go-Past Duration: the duration of all hits from the first hit on
+          the AOI until the first hit on an AOI after it, regressions to
+          earlier AOIs included. NaN if the AOI was skipped.
+        - Second-Pass Time: total time minus gaze duration.
+        - Skipped: True if an AOI after this one was fixated before this
+          one, or if it was never fixated.
+        - Regressions In: moves from an AOI after this one to this one.
+        - Regressions Out: moves from this AOI to an AOI before it.
+        - Landing Position: x of the first hit relative to the AOI's left
+          edge, in pixels.
+    """
+    if layout is None:
+        layout = StimulusLayout(aoi)
+    hit_line = np.asarray(hit_test_output["line"]).astype(int)
+    hit_part = np.asarray(hit_test_output["part"]).astype(int)
+    duration = np.asarray(hit_test_output["duration"], dtype=float)
+    hit_x = np.asarray(hit_test_output["fix_x"], dtype=float)
+    hit_aoi_x = np.asarray(hit_test_output["aoi_x"], dtype=float)
+
+    # number AOIs by (line, part), which sorts them in reading order; AOIs
+    # with the same name share their measures
+    keys, key_of = np.unique(
+        np.concatenate([
+            np.column_stack((layout.line_ids, layout.part_ids)),
+            np.column_stack((hit_line, hit_part)),
+        ]),
+        axis=0,
+        return_inverse=True,
+    )
+    key_of = key_of.reshape(-1)
+    aoi_key, hit_key = key_of[:len(layout)], key_of[len(layout):]
+    n_keys = len(keys)
+
+    count = np.bincount(hit_key, minlength=n_keys)
+    total_time = np.bincount(hit_key, weights=duration, minlength=n_keys)
+    fixated = count > 0
+
+    # passes: runs of consecutive hits on the same AOI
+    new_run = np.diff(hit_key, prepend=-1) != 0
+    run_of_hit = np.cumsum(new_run) - 1
+    run_duration = np.add.reduceat(duration, np.flatnonzero(new_run))
+
+    # index of the first hit of every AOI; AOIs never hit point one past
+    # the end, where the NaN padding is
+    first_hit = np.full(n_keys, len(duration))
+    hit_keys, first_of_key = np.unique(hit_key, return_index=True)
+    first_hit[hit_keys] = first_of_key
+    first_fixation_duration = np.append(duration, np.nan)[first_hit]
+    first_pass = np.append(run_of_hit, len(run_duration))[first_hit]
+    gaze_duration = np.append(run_duration, np.nan)[first_pass]
+
+    # transitions between AOIs; a regression goes back to an earlier AOI
+    regression = hit_key[1:] < hit_key[:-1]
+    regressions_out = np.bincount(hit_key[:-1][regression], minlength=n_keys)
+    regressions_in = np.bincount(hit_key[1:][regression], minlength=n_keys)
+
+    # the furthest AOI reached so far; an AOI is skipped if a later one was
+    # reached before its first hit
+    furthest = np.maximum.accumulate(hit_key)
+    furthest_before = np.append(-1, furthest)[first_hit]
+    skipped = ~fixated | (furthest_before > np.arange(n_keys))
+
+    # go-past ends at the first hit beyond the AOI; for an AOI that was not
+    # skipped that is where the furthest AOI first exceeds it
+    go_past_end = np.searchsorted(furthest, np.arange(n_keys), side="right")
+    go_past_duration = np.full(n_keys, np.nan)
+    read = np.flatnonzero(~skipped)
+    if len(read):
+        # sums of duration[first_hit:go_past_end], in order like the others
+        bounds = np.column_stack((first_hit[read], go_past_end[read])).reshape(-1)
+        go_past_duration[read] = np.add.reduceat(np.append(duration, 0), bounds)[::2]
+
+    landing_position = np.append(hit_x - hit_aoi_x, np.nan)[first_hit]
+
+    measures = {
+        SINGLE_FIXATION_DURATION: np.where(count == 1, first_fixation_duration, np.nan),
+        FIRST_FIXATION_DURATION: first_fixation_duration,
+        GAZE_DURATION: gaze_duration,
+        TOTAL_TIME: np.where(fixated, total_time, np.nan),
+        FIXATION_COUNT: count,
+        GO_PAST_DURATION: go_past_duration,
+        SECOND_PASS_TIME: np.where(fixated, total_time - gaze_duration, np.nan),
+        SKIPPED: skipped,
+        REGRESSIONS_IN: regressions_in,
+        REGRESSIONS_OUT: regressions_out,
+        LANDING_POSITION: landing_position,
+    }
+    return pd.DataFrame({name: values[aoi_key] for name, values in measures.items()}, index=aoi.index, columns=MEASURES)
@@ -0,0 +1,1026 @@
+#
+# This file contains several functions from Eye Movement In 
+# Programming Toolkit (EMTK)
+#
+# repo: https://github.com/nalmadi/EMIP-Toolkit
+#
+######################## from EMTK #################################
+
+
+import functools
+import io
+import numpy as np
+import random
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from . import eyelink
+from . import layout
+from .lazy import lazy_import
+
+# loaded on first use, see fix8.core
+Image = lazy_import("PIL.Image")
+pd = lazy_import("pandas")
+
+def find_background_color(img):
+    """Private function that identifies the background color of the image
+    Parameters
+    ----------
+    img : PIL.Image
+        a PIL (pillow fork) Image object
+    Returns
+    -------
+    str
+        the color of the background of the image
+    """
+
+    return _background_color(_bright_pixels(img))
+
+
+# The AOI detector works on the thresholded image as a NumPy boolean array
+# (True where the pixel is white). Instead of cropping a box and calling
+# getextrema for every pixel row and column, the rows and columns that
+# contain white and black pixels are counted with cumulative sums, so the
+# content of any sliding box is known in O(1), and line and word
+# boundaries are read off the run lengths of those profiles. The results
+# are exactly those of the original crop/getextrema scan.
+#
+# An AOIDetector keeps the array, the background color, the row profile
+# and the column profiles of the line boxes it has seen, so finding the
+# AOIs again with other margins (e.g. while the margin sliders move) only
+# redoes the cheap window and gap analysis.
+
+def _bright_pixels(img):
+    # same threshold as img.point(lambda x: 0 if x < 80 else 255, "1")
+    threshold = 80
+    return np.asarray(img.convert("L")) >= threshold
+
+
+def _background_color(bright):
+    height, width = bright.shape
+    box_size = min(width, height) // 20
+
+    white = black = 0
+
+    # Move a tiny rectangle box along the diagonal to obtain most common color
+    for x, y in zip(range(0, width, box_size), range(0, height, box_size)):
+        box = bright[y:y + box_size, x:x + box_size]
+        # crop() fills the part of a box outside the image with black
+        has_black = box.shape != (box_size, box_size) or not box.all()
+        has_white = bool(box.any())
+        white += (not has_black) + has_white
+        black += has_black + (not has_white)
+
+    # Analyze and determine the background color
+    if white > black:
+        return "white"
+    return "black"
+
+
+def _window_any(profile, size):
+    """For every window of size consecutive entries, whether any is True."""
+    counts = np.concatenate(([0], np.cumsum(profile)))
+    return counts[size:] - counts[:-size] > 0
+
+
+def _line_bounds(ink_rows, margin_height):
+    """Upper and lower bounds of the text lines, as (list, list) of ints.
+
+    ink_rows tells for every pixel row whether it has a pixel of the
+    foreground color.
+    """
+    height = len(ink_rows)
+
+    # a box of margin_height rows over the full width holds ink if any of
+    # its rows does
+    ink = _window_any(ink_rows, margin_height)[:max(height - margin_height, 0)]
+
+    # a line starts where the box first holds ink and ends where it first
+    # holds none; the boxes at the first two positions are never compared
+    upper = np.arange(2, len(ink))
+    upper_bounds = upper[ink[2:] & ~ink[1:-1]]
+    lower_bounds = upper[~ink[2:] & ink[1:-1]] + margin_height
+
+    return upper_bounds.tolist(), lower_bounds.tolist()
+
+
+def _band_columns(bright, upper_bound, lower_bound):
+    """Which columns of the line box have white and which have black pixels."""
+    if lower_bound <= upper_bound:
+        # happens when line starts and ends pair up out of order; the
+        # crop/getextrema scan failed on these boxes as well
+        raise ValueError("line box " + str((upper_bound, lower_bound)) + " has no rows")
+
+    band = bright[upper_bound:lower_bound]
+    return band.any(axis=0), ~band.all(axis=0)
+
+
+def _word_bounds(white_columns, black_columns, margin_width):
+    """Left and right bounds of the words of one line, as (list, list) of ints."""
+    n_boxes = max(len(white_columns) - margin_width, 0)
+
+    # the line starts at the first column where the box (0, upper_bound,
+    # column + 1, lower_bound) holds both colors
+    mixed = np.logical_or.accumulate(white_columns[:n_boxes]) & np.logical_or.accumulate(black_columns[:n_boxes])
+    start = int(np.argmax(mixed)) if mixed.any() else 0
+
+    # a box of margin_width columns is a gap if it holds only one color; a
+    # word runs from the end of one gap to the start of the next
+    left = np.arange(start, n_boxes)
+    gap = ~(_window_any(white_columns, margin_width)[left] & _window_any(black_columns, margin_width)[left])
+    edges = np.diff(np.concatenate(([0], gap.astype(np.int8), [0])))
+    gap_starts = left[edges[:-1] == 1]
+    gap_ends = left[edges[1:] == -1]
+
+    left_bounds = np.concatenate(([start], gap_ends[:-1] + margin_width)).astype(int)
+    right_bounds = gap_starts
+
+    return left_bounds[:len(right_bounds)].tolist(), right_bounds.tolist()
+
+
+# version of the AOIs that AOIDetector and EMTK_find_aoi find; it is part of
+# the AOI cache and index keys, so bump it whenever a change to them alters
+# the AOIs or background color of any image
+AOI_DETECTOR_VERSION = 1
+
+
+class AOIDetector:
+    """Finds the AOIs of one stimulus image, for any margins.
+
+    The image is read and thresholded once; find_aoi can then be called
+    repeatedly with different margins and levels.
+
+    Parameters
+    ----------
+    image_file_name : str, optional
+        filename for the image, the AOIs' "image" column holds its last part
+    img : PIL.Image, optional
+        PIL.Image object to use instead of reading image_file_name
+    """
+
+    # column profiles of this many line boxes are kept at most
+    max_bands = 4096
+
+    def __init__(self, image_file_name=None, img=None):
+        if img is None:
+            img = Image.open(image_file_name)
+
+        self.image_file_name = image_file_name
+        self.bright = _bright_pixels(img)
+
+        # Detect the background color
+        self.bg_color = _background_color(self.bright)
+
+        if self.bg_color == "white":
+            self.ink_rows = ~self.bright.all(axis=1)
+        else:
+            self.ink_rows = self.bright.any(axis=1)
+
+        self._bands = {}
+
+    def band_columns(self, upper_bound, lower_bound):
+        key = (upper_bound, lower_bound)
+        if key not in self._bands:
+            if len(self._bands) >= self.max_bands:
+                self._bands.clear()
+            self._bands[key] = _band_columns(self.bright, upper_bound, lower_bound)
+        return self._bands[key]
+
+    def find_aoi(self, level="sub-line", margin_height=4, margin_width=7):
+        """AOIs and background color, exactly as EMTK_find_aoi returns them."""
+        if margin_height < 1 or margin_width < 1:
+            raise ValueError("AOI margins must be at least 1 pixel")
+
+        final_result = []
+
+        line_count = 1
+
+        # Iterate through each line of code from detection
+        for upper_bound, lower_bound in zip(*_line_bounds(self.ink_rows, margin_height)):
+
+            left_bounds, right_bounds = _word_bounds(*self.band_columns(upper_bound, lower_bound), margin_width)
+
+            if level == "sub-line":
+                part_count = 1
+
+                for left, right in list(zip(left_bounds, right_bounds)):
+                    final_result.append(
+                        [
+                            "sub-line",
+                            f"line {line_count} part {part_count}",
+                            left,
+                            upper_bound,
+                            right,
+                            lower_bound,
+                        ]
+                    )
+                    part_count += 1
+
+            elif level == "line":
+                final_result.append(
+                    [
+                        "line",
+                        f"line {line_count}",
+                        left_bounds[0],
+                        upper_bound,
+                        right_bounds[-1],
+                        lower_bound,
+                    ]
+                )
+
+            line_count += 1
+
+        # Format pandas dataframe, in one go
+        columns = ["kind", "name", "x", "y", "width", "height", "image"]
+        image = self.image_file_name.split("/")[-1] if self.image_file_name is not None else None
+
+        rows = [
+            [kind, name, x, y, x0 - x, y0 - y, image]
+            for kind, name, x, y, x0, y0 in final_result
+        ]
+        # object columns holding Python ints, as DataFrame.append produced
+        aoi = pd.DataFrame(rows, columns=columns, dtype=object)
+
+        return aoi, self.bg_color
+
+
+def EMTK_find_aoi(image_file_name=None, img=None, level="sub-line", margin_height=4, margin_width=7):
+    """Find Area of Interest in the given image and store the aoi attributes in a Pandas Dataframe
+    Parameters
+    ----------
+    image : str
+        filename for the image, e.g. "vehicle_java.jpg"
+    image_path : str
+        path for all images, e.g. "emip_dataset/stimuli/"
+    img : PIL.Image, optional
+        PIL.Image object if user chooses to input an PIL image object
+    level : str, optional
+        level of detection in AOIs, "line" for each line as an AOI or "sub-line" for each token as an AOI
+    margin_height : int, optional
+        marginal height when finding AOIs, use smaller number for tight text layout
+    margin_width : int, optional
+        marginal width when finding AOIs, use smaller number for tight text layout
+    Returns
+    -------
+    pandas.DataFrame
+        a pandas DataFrame of area of interest detected by the method
+    """
+
+    if img is None and image_file_name is None:
+        return
+
+    if margin_height < 1 or margin_width < 1:
+        raise ValueError("AOI margins must be at least 1 pixel")
+
+    detector = AOIDetector(image_file_name, img)
+    return detector.find_aoi(level, margin_height, margin_width)
+
+
+@functools.lru_cache(maxsize=64)
+def composite_stimulus(image_path, modified, x_offset, y_offset, display_width, display_height):
+    """PNG bytes of a stimulus image pasted at its offset on a black display-sized background.
+
+    Every participant of an experiment sees the same stimuli, so the
+    composites are cached; modified (the image's mtime) is part of the key
+    so that an edited image is composited again.
+    """
+    # create a black background image with the same size as the display
+    img = Image.new('RGB', (display_width, display_height), color = 'black')
+
+    # overlay image on the black background with the offset keeping transparent background
+    with Image.open(image_path) as image_file:
+        layer = image_file.convert('RGBA')
+    img.paste(layer, (x_offset, y_offset), mask=layer)
+
+    png = io.BytesIO()
+    img.save(png, format='PNG')
+    return png.getvalue()
+
+
+def _write_file(path, data):
+    """Write bytes through a temporary file, so that an interrupted conversion leaves no partial output."""
+    temporary = path + '.part'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def _write_trial(trial):
+    """Write the csv, stimulus png and vcl copy of one trial; runs in a worker thread."""
+    columns, trial_id, participant_id, location, outputs, display = trial
+    csv_path, png_path, vcl_path = outputs
+
+    with open(location, 'r') as file:
+        target_line = file.readlines()[1]
+        tokens = target_line.split()
+        image = tokens[-3]
+        x_offset = tokens[-2]
+        y_offset = tokens[-1]
+
+    result = columns.frame()
+    result['trial_id'] = trial_id + 1
+    result['participant_id'] = participant_id
+    result['image'] = image
+
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    shutil.copyfile(location, vcl_path)
+    _write_file(csv_path, result.to_csv().encode('utf-8'))
+
+    image_path = location.split('VC')[0] + '../../' + image
+    png = composite_stimulus(os.path.abspath(image_path), os.stat(image_path).st_mtime_ns,
+                             int(x_offset), int(y_offset), *display)
+    _write_file(png_path, png)
+
+
+# modified from EMTK
+def read_EyeLink1000_experiment(filename, destination_path, runtime_folder=None, jobs=1, overwrite=False):
+    """Read asc file from Eye Link 1000 eye tracker
+
+    Parameters
+    ----------
+    filename : str
+        name of the asc file
+        
+    filetype : str
+        filetype of the file, e.g. "tsv"
+
+    jobs : int, optional
+        number of processes parsing the trials, and of threads writing
+        them, None for one per CPU
+
+    overwrite : bool, optional
+        write trials again whose csv, png and vcl files already exist
+    """
+
+    print("parsing file:", filename)
+
+    participant_id = filename.split('/')[-1].replace('.asc', '')
+    experiment = participant_id
+
+    # the trials are written by a thread pool while the next ones are parsed
+    written = skipped = 0
+    with ThreadPoolExecutor(max_workers=jobs) as writers:
+        futures = []
+        display = None
+        for columns, trial_id, trial_display in eyelink.parse_trials(filename, jobs):
+
+            # the display size is the last one given before the end of the trial
+            if trial_display is not None:
+                display = trial_display
+
+            # Read image location
+            index = str(int(trial_id) + 1)
+
+            # Trying not to break existing code
+            if not runtime_folder:
+                runtime_folder_path = '/'.join(filename.split('/')[:-1])
+                location = runtime_folder_path + '/runtime/dataviewer/' + experiment + '/graphics/VC_' + index + '.vcl'
+            else:
+                runtime_folder_path = runtime_folder
+                location = runtime_folder_path + '/dataviewer/' + experiment + '/graphics/VC_' + index + '.vcl'
+
+            # a folder with trial number at destination_path
+            trial_folder = destination_path + '/P_' + str(experiment) + '/' + str(trial_id  + 1) + '/'
+            outputs = (
+                trial_folder + 'P' + str(experiment) + '_T' + str(trial_id  + 1) + '.csv',
+                trial_folder + str(trial_id  + 1) + '.png',
+                trial_folder + os.path.basename(location),
+            )
+            if not overwrite and all(os.path.exists(output) for output in outputs):
+                skipped += 1
+                continue
+
+            futures.append(writers.submit(_write_trial, (columns, trial_id, participant_id, location, outputs, display)))
+            written += 1
+
+        # raise the first error of a trial, if any
+        for future in futures:
+            future.result()
+
+    print("Wrote " + str(written) + " trials to " + destination_path + ", skipped " + str(skipped) + " already written")
+
+
+def find_lines_y( aoi):
+    """returns the distinct line centers (y + height / 2), in table order"""
+    centers = layout.aoi_line_centers(aoi)
+    return centers[layout.first_occurrences(centers)].tolist()
+
+
+def find_word_centers(aois):
+    """returns a list of word centers"""
+    centers = layout.aoi_word_centers(aois)
+    return centers[layout.first_occurrences(centers)].tolist()
+
+
+def overlap(fix, AOI, radius=25):
+    """Checks if fixation is within radius distance or over an AOI. Returns True/False.
+
+    Parameters
+    ----------
+    fix : Fixation
+        A single fixation in a trial being considered for overlapping with the AOI
+
+    AOI : pandas.DataFrame
+        contains AOI #kind	name	x	y	width	height	local_id	image	token
+
+    radius : int, optional
+        radius around AOI to consider fixations in it within the AOI.
+        default is 25 pixel since the fixation filter groups samples within 25 pixels.
+
+    Returns
+    -------
+    bool
+        whether it overlaps
+    """
+
+    box_x = AOI.x - (radius / 2)
+    box_y = AOI.y - (radius / 2)
+    box_w = AOI.width + (radius / 2)
+    box_h = AOI.height + (radius / 2)
+
+    return box_x <= fix[0] and fix[0] <= box_x + box_w and box_y <= fix[1] and fix[1] <= box_y + box_h
+
+
+def hit_test(fixations, file_name, aois_tokens, radius=25):
+    """Checks if fixations are within AOI with a fixation radius of 25 px
+        (since each fix is a sum of samples within 25px)
+
+    Parameters
+    ----------
+    fixations : list
+        contains fixations and other metadata (trial#, participant, code_file, code_language)
+            - fixation includes timestamp, duration, x_cord, y_cord
+
+    aois_tokens : pandas.Dataframe
+        contains each AOI location and dimension and token text
+
+    radius : int, optional
+        radius of circle using in hit test
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with a record representing each fixation, each record contains:
+        trial, participant, code_file, code_language, timestamp, duration, x_cord, y_cord, token, length
+    """
+
+    # open the fixations json file
+    # raw_data = json.load(open(fixations_file))
+    
+    # fixations = []
+    # for key in raw_data.keys():
+    #     fixations.append(raw_data[key])
+
+    # participant_id = fixations_file.split('\\')[-1].split('_')[0]
+    # trial_id = '_'.join(fixations_file.split('\\')[-1].split('_')[1:6])
+    # file_name = fixations_file
+
+    # from parameters
+    # fixations list
+    # participant_id
+    # trial_id
+    # file_name
+    # aois
+    # radius
+
+    header = ["file_name",
+              "fix_x",
+              "fix_y",
+              "duration",
+              "aoi_x",
+              "aoi_y",
+              "aoi_width",
+              "aoi_height",
+              "line",
+              "part",
+              "image"]
+
+    fixations = np.asarray(fixations)
+    if len(fixations) == 0 or len(aois_tokens) == 0:
+        return pd.DataFrame(columns=header)
+
+    # the boxes of overlap(), inflated by radius / 2 to the left and top
+    box_x = np.asarray(aois_tokens["x"], dtype=float) - (radius / 2)
+    box_y = np.asarray(aois_tokens["y"], dtype=float) - (radius / 2)
+    box_w = np.asarray(aois_tokens["width"], dtype=float) + (radius / 2)
+    box_h = np.asarray(aois_tokens["height"], dtype=float) + (radius / 2)
+
+    # only one AOI can be hit by a fixation: the first one in table order
+    grid = layout.BoxGrid(box_x, box_y, box_x + box_w, box_y + box_h)
+    hits = grid.first_containing(fixations[:, 0], fixations[:, 1])
+    hit_fixations = np.nonzero(hits >= 0)[0]
+    hit_aois = hits[hit_fixations]
+    if len(hit_fixations) == 0:
+        return pd.DataFrame(columns=header)
+
+    names = aois_tokens["name"].to_numpy()[hit_aois]
+    return pd.DataFrame({
+        "file_name": [file_name] * len(hit_fixations),
+        # lists, so that the column types are inferred from the values like
+        # they were when the result was built row by row
+        "fix_x": fixations[hit_fixations, 0].tolist(),
+        "fix_y": fixations[hit_fixations, 1].tolist(),
+        "duration": fixations[hit_fixations, 2].tolist(),
+        "aoi_x": aois_tokens["x"].to_numpy()[hit_aois],
+        "aoi_y": aois_tokens["y"].to_numpy()[hit_aois],
+        "aoi_width": aois_tokens["width"].to_numpy()[hit_aois],
+        "aoi_height": aois_tokens["height"].to_numpy()[hit_aois],
+        "line": [name.split(' ')[1] for name in names],
+        "part": [name.split(' ')[3] for name in names],
+        "image": aois_tokens["image"].to_numpy()[hit_aois],
+    }, columns=header)
+
+######################## end from EMTK #################################
+
+def distance(fix1, fix2):
+    ''' returns distance between two fixations '''
+    return ((fix1[0] - fix2[0])**2 + (fix1[1] - fix2[1])**2)**0.5
+
+
+
+def read_EyeLink1000(filename, filepath, chunk_rows=None, jobs=1):
+    """Read asc file from Eye Link 1000 eye tracker and write a result in a csv file.
+    Parameters
+    ----------
+    filename : str
+        name of the asc file
+    filepath : str
+        filepath to write the csv file
+    chunk_rows : int, optional
+        if given, the csv file is written every chunk_rows events and the
+        events are not kept in memory (None is returned); the file is
+        then parsed in this process
+    jobs : int, optional
+        number of processes parsing the trials of the file, None for one
+        per CPU
+        
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with the data from the asc file
+    """
+
+    print("parsing file:", filename)
+
+    if chunk_rows is not None:
+        for index, chunk in enumerate(eyelink.iter_events(filename, chunk_rows)):
+            chunk.to_csv(filepath, mode="w" if index == 0 else "a", header=index == 0)
+        print("Wrote a csv file to: " + filepath)
+        return None
+
+    columns = eyelink.EventColumns()
+    for trial_columns, _, _ in eyelink.parse_trials(filename, jobs):
+        columns.extend(trial_columns)
+    result = columns.frame()
+
+    result.to_csv(filepath)
+    print("Wrote a csv file to: " + filepath)
+    return result
+
+#######################
+##### From Correction.y
+#######################
+
+def generate_fixations_left(aois_with_tokens, dispersion):
+    """
+    function to generate fixations at the optimal viewing poisiton slightly to
+    the left of the center of each word
+
+    Parameters
+    ----------
+    aois_with_tokens : pandas.DataFrame
+        a dataframe containing the AOIs and tokens
+
+    Returns
+    ----------
+    fixations : list
+        a list of generated fixations
+    """
+
+    fixations = []
+
+    for index, row in aois_with_tokens.iterrows():
+        x, y, width, height = (
+            row["x"],
+            row["y"],
+            row["width"],
+            row["height"]
+        )
+
+        fixation_x = x + width / 3  + random.randint(-dispersion, dispersion)
+        fixation_y = y + height / 2  + random.randint(-dispersion, dispersion)
+
+        fixations.append([fixation_x, fixation_y, width * 3])
+
+    return fixations
+
+
+
+def exp_func(x, k, lam):
+    """
+    function to model the exponential distribution
+
+    Parameters
+    ----------
+    x : float
+        x value
+
+    k : float
+        constant value
+
+    lam : float
+        lambda value
+
+    Returns
+    ----------
+    float
+        the value of the exponential function
+
+    """
+    return k * np.exp(-lam * x)
+
+
+def generate_fixations_left_skip(aois_with_tokens, approximate_letter_width, lam_value, k_value):
+    """
+    function to generate fixations at the optimal viewing poisiton slightly to
+    the left of the center of each word, also skips short words with a probability
+    defined by the user
+
+    Parameters
+    ----------
+    aois_with_tokens : pandas.DataFrame
+        a dataframe containing the AOIs and tokens
+
+    approximate_letter_width : int
+        approximate width of a letter in pixels
+
+    lam_value : float
+        lambda value for the exponential distribution
+
+    k_value : float
+        constant value for the exponential distribution
+
+    Returns
+    ----------
+    fixations : list
+        a list of generated fixations
+    """
+
+    fixations = []
+    word_count = 0
+    skip_count = 0
+
+    for index, row in aois_with_tokens.iterrows():
+        x, y, width, height = (
+            row["x"],
+            row["y"],
+            row["width"],
+            row["height"]
+        )
+
+        word_count += 1
+
+        fixation_x = x + width / 3 + random.randint(-10, 10)
+        fixation_y = y + height / 2 + random.randint(-10, 10)
+
+        # skip probability based on an exponential distribution
+        # based on brysbaert1998word
+        letters = width / approximate_letter_width
+        skip_probability = exp_func(letters, k_value, lam_value)
+
+        if random.random() < skip_probability:
+            skip_count += 1 
+        else:
+            fixations.append([fixation_x, fixation_y, width * 3])
+
+    # print(skip_count / word_count)
+    return fixations
+
+
+def within_line_regression(aois_with_tokens, regression_probability):
+    """
+    function to generate fixations at the optimal viewing poisiton slightly to
+    the left of the center of each word, also simulates WITHIN-line regressions
+    with a probability defined by the user
+
+    Parameters
+    ----------
+    aois_with_tokens : pandas.DataFrame
+        a dataframe containing the AOIs and tokens
+
+    regression_probability : float
+        probability of regression
+
+    Returns
+    ----------
+    fixations : list
+        a list of generated fixations
+    """
+        
+    fixations = []
+
+    aoi_list = aois_with_tokens.values.tolist()
+
+    # pick regression indexes
+    regression_indexes = []
+    for index, row in aois_with_tokens.iterrows():
+        if index > 2 and random.random() < regression_probability / 10:
+            regression_indexes.append(index)
+
+    # pick at least one regression index if probability is not 0
+    if len(regression_indexes) == 0 and regression_probability > 0:
+        regression_indexes.append(random.randint(2, len(aoi_list)-1))
+
+
+    index = 0
+    while index < len(aoi_list):
+        # x, y, width, height, token = (
+        x, y, width, height = (
+                                aoi_list[index][2],
+                                aoi_list[index][3],
+                                aoi_list[index][4],
+                                aoi_list[index][5],
+                                #aoi_list[index][7],
+                                )
+
+        line = int(str(aoi_list[index][1]).split(" ")[1])
+
+        fixation_x = x + width / 3 + random.randint(-10, 10)
+        fixation_y = y + height / 2 + random.randint(-10, 10)
+        duration = 100 + (width/15) * 40
+
+        fixations.append([fixation_x, fixation_y, duration])
+
+        if index in regression_indexes:
+            regression_indexes.remove(index)
+            rand_index = random.randint(index-10, index-1)
+
+            attempts = 0
+
+            # keep trying to find a word on a different line
+            while (
+                int(str(aoi_list[rand_index][1]).split(" ")[1]) != line
+                and attempts < 10
+            ):
+                rand_index = random.randint(0, index-1)
+                attempts += 1
+
+            if attempts != 10:
+                index = rand_index
+
+        index += 1
+
+    return fixations
+
+
+def between_line_regression(aois_with_tokens, regression_probability):
+    """
+    function to generate fixations at the optimal viewing poisiton slightly to
+    the left of the center of each word, also simulates BETWEEN-line regressions
+    with a probability defined by the user
+
+    Parameters
+    ----------
+    aois_with_tokens : pandas.DataFrame
+        a dataframe containing the AOIs and tokens
+
+    regression_probability : float
+        probability of regression
+
+    Returns
+    ----------
+    fixations : list
+        a list of generated fixations
+    """
+        
+    fixations = []
+
+    aoi_list = aois_with_tokens.values.tolist()
+
+    # pick regression indexes
+    regression_indexes = []
+    for index, row in aois_with_tokens.iterrows():
+        if index > 2 and random.random() < regression_probability / 10:
+            regression_indexes.append(index)
+
+    # pick at least one regression index if probability is not 0
+    if len(regression_indexes) == 0 and regression_probability > 0:
+        regression_indexes.append(random.randint(2, len(aoi_list)-1))
+
+
+    index = 0
+    while index < len(aoi_list):
+        # x, y, width, height, token = (
+        x, y, width, height = (
+                                aoi_list[index][2],
+                                aoi_list[index][3],
+                                aoi_list[index][4],
+                                aoi_list[index][5],
+                                #aoi_list[index][7],
+                                )
+
+        line = int(str(aoi_list[index][1]).split(" ")[1])
+
+        fixation_x = x + width / 3 + random.randint(-10, 10)
+        fixation_y = y + height / 2 + random.randint(-10, 10)
+        duration = 100 + (width/15) * 40
+
+        fixations.append([fixation_x, fixation_y, duration])
+
+        if index in regression_indexes:
+            regression_indexes.remove(index)
+            rand_index = random.randint(0, index-1)
+
+            attempts = 0
+
+            # keep trying to find a word on a different line
+            while (
+                int(str(aoi_list[rand_index][1]).split(" ")[1]) == line
+                and attempts < 10
+            ):
+                rand_index = random.randint(0, index-1)
+                attempts += 1
+
+            if attempts != 10:
+                index = rand_index
+
+        index += 1
+
+    return fixations
+
+
+def error_offset(y_offset, fixations):
+    """
+    Introduces an offset distortion to the fixations
+
+    Parameters
+    ----------
+    x_offset : int
+        offset in the x direction
+
+    y_offset : int
+        offset in the y direction
+
+    fixations : list
+        a list of fixations
+
+    Returns
+    ----------
+    fixations : list
+        a list of distorted fixations
+    """
+
+    results = []
+
+    for fix in fixations:
+        x, y = fix[0], fix[1]
+        results.append([x, y + y_offset, fix[2]])
+
+    return results
+
+
+def error_shift(y_shift_factor, line_ys, fixations):
+    """
+    Introduces a shift distortion to the fixations
+
+    Parameters
+    ----------
+    y_shift_factor : float
+        shift factor
+
+    line_ys : list
+        a list of line Ys
+        
+    fixations : list
+        a list of fixations
+
+    Returns
+    ----------
+    fixations : list
+        a list of distorted fixations
+    """
+
+    results = []
+
+    line_height = line_ys[1] - line_ys[0]
+
+    for fix in fixations:
+        x, y = fix[0], fix[1]
+
+        distance_from_first_line = abs(y - line_ys[0])
+
+        results.append(
+            [x, y + ((distance_from_first_line/line_height*2) * y_shift_factor/2), fix[2]]
+        )
+
+
+    return results
+
+
+
+def error_droop(droop_factor, fixations):
+    """
+    Introduces a slope/droop distortion to the fixations
+
+    Parameters
+    ----------
+    droop_factor : float
+        droop factor
+        
+    fixations : list
+        a list of fixations
+
+    Returns
+    ----------
+    fixations : list
+        a list of distorted fixations
+    """
+
+    results = []
+
+    first_x = fixations[0][0]
+
+    for fix in fixations:
+        x, y = fix[0], fix[1]
+
+        results.append([x, y + ((x - first_x) / 100 * droop_factor), fix[2]])
+
+    return results
+
+
+def get_single_fixation_duration(hit_test_output, line, part):
+    """
+    function to get the duration of the first fixation on an aoi if only one 
+    fixation was made on the aoi, nan otherwise
+    """
+
+    fixations_on_same_part_and_line = hit_test_output[(hit_test_output["part"] == part) & (hit_test_output["line"] == line)]
+
+    # if only one fixation was made on the aoi, return its duration
+    if len(fixations_on_same_part_and_line) == 1:
+        return fixations_on_same_part_and_line.iloc[0]["duration"]
+    else:
+        return np.nan
+
+
+def get_first_fixation_duration(hit_test_output, line, part):
+    """
+    function to get the duration of the first fixation on an aoi
+    nan if no fixation was made on the aoi
+    """
+
+    fixations_on_same_part_and_line = hit_test_output[(hit_test_output["part"] == part) & (hit_test_output["line"] == line)]
+
+    # if there are fixations on the aoi, return the duration of the first fixation
+    if len(fixations_on_same_part_and_line) > 0:
+        return fixations_on_same_part_and_line.iloc[0]["duration"]
+    else:
+        return np.nan
+    
+
+def get_gaze_duration(hit_test_output, line, part):
+    """
+    function to get the total duration of fixations on an aoi before moving to the next word
+    nan if no fixation was made on the aoi
+    """
+
+    gaze_duration = 0
+    active = False
+
+    for index, row in hit_test_output.iterrows():
+        if (row["part"] != part or row["line"] != line) and active:
+            return gaze_duration
+
+        if row["part"] == part and row["line"] == line:
+            gaze_duration += row["duration"]
+            active = True
+
+    # the first pass lasted until the end of the trial
+    return gaze_duration if active else np.nan
+                
+
+def get_total_time(hit_test_output, line, part):
+    """
+    function to get the total duration of fixations on an aoi
+    nan if no fixation was made on the aoi
+    """
+
+    fixations_on_same_part_and_line = hit_test_output[(hit_test_output["part"] == part) & (hit_test_output["line"] == line)]
+
+    # if there are fixations on the aoi, return the total duration of fixations on the aoi
+    if len(fixations_on_same_part_and_line) > 0:
+        return fixations_on_same_part_and_line["duration"].sum()
+    else:
+        return np.nan
+    
+
+def get_fixation_count(hit_test_output, line, part):
+    """
+    function to get the number of fixations on an aoi
+    0 if no fixation was made on the aoi
+    """
+
+    fixations_on_same_part_and_line = hit_test_output[(hit_test_output["part"] == part) & (hit_test_output["line"] == line)]
+
+    return len(fixations_on_same_part_and_line)
\ No newline at end of file
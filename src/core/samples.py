@@ -0,0 +1,448 @@
+"""
+Raw gaze samples and fixation detection.
+
+read_asc_samples() reads the sample lines of an EyeLink .asc file, and
+read_csv_samples() the time stamp, x and y columns of a CSV from any eye
+tracker, into NumPy arrays. ivt() (velocity threshold) and idt()
+(dispersion threshold) label every sample as part of a fixation, a saccade
+or a blink (missing gaze), and eye_events() turns the labels into the
+eye_events table Fix8 reads from EyeLink's own EFIX/ESACC/EBLINK events,
+so that fixations can be detected again with other thresholds.
+
+Samples are continuous only within a recording: an .asc file has a
+START...END block per recording and TRIALID messages between trials, and a
+tracker may drop samples. Events never span a new block, a new trial or a
+time step of more than GAP_INTERVALS sample intervals; Samples.breaks()
+marks where they have to end.
+
+Time stamps are in milliseconds and positions in pixels, so velocities are
+in pixels per second and saccade amplitudes in pixels (EyeLink reports
+degrees of visual angle).
+"""
+
+import io
+
+import numpy as np
+
+from .eyelink import BLINK, EVENTS, FIXATION, HEADER, SACCADE, trialid_lines
+from .lazy import lazy_import
+
+# loaded on first use, see fix8.core
+pd = lazy_import("pandas")
+
+
+# a step between two samples longer than this many sample intervals is a
+# gap in the recording
+GAP_INTERVALS = 10
+
+
+class Samples:
+    """Gaze samples as arrays: time stamps (ms), x and y (pixels, NaN when
+    gaze was lost) and pupil size (NaN if not recorded).
+
+    block numbers the recordings the samples come from, and trial is the
+    trial of each sample (the value of the last TRIALID before it, -1 if
+    none); both are constant when not given.
+    """
+
+    def __init__(self, time_stamp, x, y, pupil=None, block=None, trial=None):
+        self.time_stamp = np.asarray(time_stamp)
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.pupil = np.full(len(self.x), np.nan) if pupil is None else np.asarray(pupil, dtype=float)
+        self.block = np.zeros(len(self.x), dtype=int) if block is None else np.asarray(block)
+        self.trial = np.full(len(self.x), -1) if trial is None else np.asarray(trial)
+
+    def __len__(self):
+        return len(self.time_stamp)
+
+    def __getitem__(self, index):
+        return Samples(self.time_stamp[index], self.x[index], self.y[index], self.pupil[index],
+                       self.block[index], self.trial[index])
+
+    def interval(self):
+        """The typical time between two samples."""
+        if len(self) < 2:
+            return 1
+        interval = np.median(np.diff(self.time_stamp))
+        if np.issubdtype(self.time_stamp.dtype, np.integer):
+            interval = max(int(round(interval)), 1)
+        return interval
+
+    def breaks(self):
+        """True for the first sample of every continuous stretch of samples.
+
+        A stretch ends where a recording block or a trial ends, and at a
+        time step of more than GAP_INTERVALS sample intervals.
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=bool)
+        step = np.diff(self.time_stamp)
+        new = (step > GAP_INTERVALS * self.interval()) | (np.diff(self.block) != 0) | (np.diff(self.trial) != 0)
+        return np.concatenate(([True], new))
+
+    def trials(self):
+        """[(trial, Samples of that trial)] in the order the trials were recorded."""
+        if len(self) == 0:
+            return []
+        first = np.flatnonzero(np.diff(self.trial, prepend=self.trial[0] - 1) != 0)
+        last = np.append(first[1:], len(self))
+        return [(self.trial[start], self[start:end]) for start, end in zip(first, last)]
+
+
+def _numeric(column):
+    if column.dtype == object:
+        column = pd.to_numeric(column, errors="coerce")
+    return column.to_numpy()
+
+
+def _starting_with(buf, starts, prefix):
+    """Which of the lines starting at starts begin with prefix."""
+    found = np.ones(len(starts), dtype=bool)
+    for offset, char in enumerate(prefix):
+        position = np.minimum(starts + offset, len(buf) - 1)
+        found &= buf[position] == char
+    return found
+
+
+def _parse_asc_samples(data, eye):
+    """The samples of a part of an .asc file that ends at a line end.
+
+    Returns the time, x, y and pupil columns, and the byte offsets of the
+    samples, of the START lines and of the TRIALID lines with their values.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    line_ends = np.flatnonzero(buf == ord("\n"))
+    starts = np.concatenate(([0], line_ends + 1))
+    starts = starts[starts < len(buf)]
+    ends = np.append(line_ends, len(buf))[:len(starts)]
+
+    first = buf[starts]
+    is_sample = (first >= ord("0")) & (first <= ord("9"))
+    block_starts = starts[_starting_with(buf, starts, b"START")]
+    trialids = trialid_lines(data)
+    binocular = any(b"LEFT" in data[start:end] and b"RIGHT" in data[start:end]
+                    for start, end in zip(starts[_starting_with(buf, starts, b"SAMPLES")],
+                                          ends[_starting_with(buf, starts, b"SAMPLES")]))
+
+    # sample lines are time, x, y, pupil for one eye, then for the other eye
+    # if both were recorded, then input and flag columns; each line is cut
+    # after the last column needed, which saves pandas most of the parsing
+    columns = [0, 4, 5, 6] if binocular and eye == "right" else [0, 1, 2, 3]
+    sample_starts, sample_ends = starts[is_sample], ends[is_sample]
+    tabs = np.flatnonzero(buf == ord("\t"))
+    cut_tab = np.searchsorted(tabs, sample_starts) + columns[-1]
+    cut = np.where(cut_tab < len(tabs), tabs[np.minimum(cut_tab, len(tabs) - 1)], sample_ends)
+    cut = np.minimum(cut, sample_ends)
+
+    values = [np.zeros(0)] * 4
+    if len(sample_starts):
+        text = b"\n".join(map(data.__getitem__, map(slice, sample_starts.tolist(), cut.tolist())))
+        table = pd.read_csv(io.BytesIO(text), sep="\t", header=None, names=range(columns[-1] + 1), usecols=columns,
+                            skipinitialspace=True, na_values=["."], keep_default_na=False)
+        values = [_numeric(table[column]) for column in columns]
+    trials = [(start, int(token[-1])) for start, token in trialids]
+    return values, sample_starts, block_starts, trials
+
+
+def read_asc_samples(filename, eye="left", chunk_bytes=1 << 26):
+    """Read the sample lines of an EyeLink .asc file.
+
+    Parameters
+    ----------
+    filename : str
+        name of the asc file
+    eye : str, optional
+        "left" or "right", the eye to read from a binocular recording;
+        monocular recordings have only one
+    chunk_bytes : int, optional
+        size of the parts of the file that are read and parsed at a time
+
+    Returns
+    -------
+    Samples
+        with the recording block (counting START lines from 0) and the
+        trial (the value of the last TRIALID) of every sample
+    """
+    parts = []
+    # the block and trial that continue into the next part
+    block = -1
+    trial = -1
+    with open(filename, "rb") as asc_file:
+        while True:
+            data = asc_file.read(chunk_bytes)
+            if not data:
+                break
+            data += asc_file.readline()
+            values, sample_starts, block_starts, trials = _parse_asc_samples(data, eye)
+
+            sample_block = block + np.searchsorted(block_starts, sample_starts, side="right")
+            trial_starts = np.array([start for start, _ in trials], dtype=int)
+            trial_values = np.array([trial] + [value for _, value in trials])
+            sample_trial = trial_values[np.searchsorted(trial_starts, sample_starts, side="right")]
+            parts.append(values + [sample_block, sample_trial])
+
+            block += len(block_starts)
+            trial = trial_values[-1]
+
+    if not parts:
+        return Samples(np.zeros(0, dtype=np.int64), [], [], [])
+    return Samples(*(np.concatenate(column) for column in zip(*parts)))
+
+
+def read_csv_samples(filename, time_stamp="timestamp", x="x", y="y", pupil=None):
+    """Read gaze samples from the given columns of a CSV file.
+
+    pupil is the name of the pupil size column, if there is one. Rows
+    whose x or y is empty or not a number are missing gaze.
+    """
+    columns = [time_stamp, x, y] + ([pupil] if pupil is not None else [])
+    table = pd.read_csv(filename, usecols=columns)
+    return Samples(*(_numeric(table[column]) for column in columns))
+
+
+def read_samples(filename, **options):
+    """read_asc_samples() for .asc files, read_csv_samples() for anything else."""
+    if filename.lower().endswith(".asc"):
+        return read_asc_samples(filename, **options)
+    return read_csv_samples(filename, **options)
+
+
+def velocities(samples):
+    """Speed of the gaze at every sample in pixels per second, NaN where gaze was lost.
+
+    The speed of a sample is that of the move from the previous sample; the
+    first sample of a stretch (see Samples.breaks) gets the speed of the
+    move to the next one.
+    """
+    breaks = samples.breaks()
+    speed = np.full(len(samples), np.nan)
+    if len(samples) < 2:
+        return speed
+    distance = np.hypot(np.diff(samples.x), np.diff(samples.y))
+    elapsed = np.diff(samples.time_stamp).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        move = 1000 * distance / elapsed
+    speed[1:] = move
+    first = np.flatnonzero(breaks)
+    has_next = first + 1 < len(samples)
+    has_next[has_next] = ~breaks[first[has_next] + 1]
+    speed[first] = np.nan
+    speed[first[has_next]] = move[first[has_next]]
+    return speed
+
+
+def _runs(labels, breaks):
+    """(first, last) sample of every run of equal labels, cut at breaks."""
+    if len(labels) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    first = np.flatnonzero((np.diff(labels, prepend=-1) != 0) | breaks)
+    last = np.append(first[1:], len(labels)) - 1
+    return first, last
+
+
+def _missing(samples):
+    return np.isnan(samples.x) | np.isnan(samples.y)
+
+
+def ivt(samples, velocity_threshold=2000, min_duration=50):
+    """Velocity-threshold identification (I-VT) of fixations.
+
+    Samples slower than velocity_threshold (pixels per second) are
+    fixation samples, and runs of them lasting at least min_duration (ms)
+    are fixations. The other samples are saccades, or blinks where gaze
+    was lost.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray)
+        the label of every sample: eyelink.FIXATION, SACCADE or BLINK, and
+        where events start that the labels do not show (never, for I-VT:
+        every run of fixation samples is one fixation)
+    """
+    with np.errstate(invalid="ignore"):
+        slow = velocities(samples) < velocity_threshold
+    labels = np.where(slow, FIXATION, SACCADE).astype(np.int8)
+    labels[_missing(samples)] = BLINK
+
+    # fixations too short to count are part of the saccade around them
+    first, last = _runs(labels, samples.breaks())
+    time_stamp = samples.time_stamp
+    short = (labels[first] == FIXATION) & (time_stamp[last] - time_stamp[first] + samples.interval() < min_duration)
+    labels[np.repeat(short, last - first + 1)] = SACCADE
+    return labels, np.zeros(len(labels), dtype=bool)
+
+
+def _window_spread(values, first, last):
+    """max - min of values[first[i]:last[i] + 1] for every i; NaN if that has a NaN.
+
+    A sparse table of range maxima and minima, built one level at a time,
+    so memory stays linear whatever the window lengths.
+    """
+    spread = np.empty(len(first))
+    level = np.floor(np.log2(last - first + 1)).astype(int)
+    high = low = values
+    for step in range(level.max() + 1 if len(level) else 0):
+        width = 1 << step
+        windows = np.flatnonzero(level == step)
+        other = last[windows] - width + 1
+        spread[windows] = (np.maximum(high[first[windows]], high[other])
+                           - np.minimum(low[first[windows]], low[other]))
+        high = np.maximum(high[:-width], high[width:])
+        low = np.minimum(low[:-width], low[width:])
+    return spread
+
+
+def _extend(x, y, first, last, stop, dispersion_threshold):
+    """Last sample j, last <= j < stop, such that x, y[first:j + 1] stay within dispersion_threshold.
+
+    The window grows in blocks of doubling size, and within a block the
+    running extremes find where the dispersion is first exceeded.
+    """
+    x_min, x_max = x[first:last + 1].min(), x[first:last + 1].max()
+    y_min, y_max = y[first:last + 1].min(), y[first:last + 1].max()
+    start = last + 1
+    size = max(last + 1 - first, 16)
+    while start < stop:
+        block = slice(start, min(start + size, stop))
+        block_x_min = np.minimum.accumulate(np.minimum(x[block], x_min))
+        block_x_max = np.maximum.accumulate(np.maximum(x[block], x_max))
+        block_y_min = np.minimum.accumulate(np.minimum(y[block], y_min))
+        block_y_max = np.maximum.accumulate(np.maximum(y[block], y_max))
+        dispersion = (block_x_max - block_x_min) + (block_y_max - block_y_min)
+        # NaN (lost gaze) ends the fixation too
+        exceeded = np.flatnonzero(~(dispersion <= dispersion_threshold))
+        if len(exceeded):
+            return start + exceeded[0] - 1
+        x_min, x_max, y_min, y_max = block_x_min[-1], block_x_max[-1], block_y_min[-1], block_y_max[-1]
+        start += size
+        size *= 2
+    return stop - 1
+
+
+def idt(samples, dispersion_threshold=25, min_duration=100):
+    """Dispersion-threshold identification (I-DT) of fixations.
+
+    A fixation is a window of samples lasting at least min_duration (ms)
+    whose dispersion, (max x - min x) + (max y - min y), is at most
+    dispersion_threshold (pixels), grown for as long as it stays so.
+    Windows are tried from the first sample on; a window that is too
+    dispersed moves on by one sample, and the next window after a fixation
+    starts after its last sample. Windows do not cross Samples.breaks().
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray)
+        the label of every sample: eyelink.FIXATION, SACCADE or BLINK, and
+        True at the first sample of every fixation, since a fixation can
+        follow another one without a saccade sample between them
+
+    Examples
+    --------
+    Gaze that jumps between two samples is two fixations:
+
+    >>> time_stamp = np.arange(0, 2000, 2)
+    >>> x = np.where(time_stamp < 1000, 100.0, 400.0)
+    >>> events = detect(Samples(time_stamp, x, np.full(len(x), 200.0)), "I-DT")
+    >>> events[["time_stamp", "x_cord", "duration"]].values.tolist()
+    [[0.0, 100.0, 1000.0], [1000.0, 400.0, 1000.0]]
+    """
+    x, y, time_stamp = samples.x, samples.y, samples.time_stamp
+    labels = np.full(len(samples), SACCADE, dtype=np.int8)
+    labels[_missing(samples)] = BLINK
+    fixation_starts = np.zeros(len(samples), dtype=bool)
+    if len(samples) == 0:
+        return labels, fixation_starts
+
+    # the last sample of the stretch of every sample
+    breaks = samples.breaks()
+    stretch_last = np.append(np.flatnonzero(breaks)[1:], len(samples)) - 1
+    stretch_end = stretch_last[np.cumsum(breaks) - 1]
+
+    # the smallest window starting at each sample that lasts min_duration
+    last = np.searchsorted(time_stamp, time_stamp + (min_duration - samples.interval()), side="left")
+    last = np.maximum(last, np.arange(len(samples)))
+    complete = np.flatnonzero(last <= stretch_end)
+    dispersion = (_window_spread(x, complete, last[complete])
+                  + _window_spread(y, complete, last[complete]))
+    starts = complete[dispersion <= dispersion_threshold]
+
+    # the fixations, each from the first fitting window after the last one
+    position = 0
+    while True:
+        index = np.searchsorted(starts, position)
+        if index == len(starts):
+            break
+        first = starts[index]
+        end = _extend(x, y, first, last[first], stretch_end[first] + 1, dispersion_threshold)
+        labels[first:end + 1] = FIXATION
+        fixation_starts[first] = True
+        position = end + 1
+    return labels, fixation_starts
+
+
+def eye_events(samples, labels, starts=None):
+    """The fixations, saccades and blinks of labelled samples, as an eye_events table.
+
+    Every run of samples with the same label is one event, and a new event
+    also starts where starts (a boolean array, as returned by the
+    detectors) is True. The events have the columns of EyeLink's events
+    (see eyelink.HEADER):
+
+    - fixation: mean x, y and pupil size (NaN if no sample has one);
+    - saccade: x, y of its first sample, x1, y1 of its last, the amplitude
+      (distance between the two) and the peak velocity, in pixels per second;
+    - blink: time and duration only.
+
+    The duration of an event runs to the end of its last sample, one sample
+    interval after its time stamp. Events end at Samples.breaks(); use
+    Samples.trials() for a table per trial, like the trial files of
+    mini_emtk.read_EyeLink1000_experiment.
+    """
+    breaks = samples.breaks()
+    if starts is not None:
+        breaks = breaks | starts
+    first, last = _runs(labels, breaks)
+    event = labels[first]
+    time_stamp = samples.time_stamp
+    nan = np.full(len(first), np.nan)
+
+    def mean(values):
+        # of the samples with a value
+        if len(first) == 0:
+            return nan
+        known = ~np.isnan(values)
+        total = np.add.reduceat(np.where(known, values, 0), first)
+        known_count = np.add.reduceat(known.astype(int), first)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(known_count > 0, total / known_count, np.nan)
+
+    fixation = event == FIXATION
+    saccade = event == SACCADE
+    x0, y0 = samples.x[first], samples.y[first]
+    x1, y1 = samples.x[last], samples.y[last]
+    speed = velocities(samples)
+    peak_velocity = np.maximum.reduceat(np.nan_to_num(speed), first) if len(first) else nan
+
+    columns = {
+        "time_stamp": time_stamp[first],
+        "eye_event": pd.Categorical.from_codes(event, categories=EVENTS),
+        "x_cord": np.where(fixation, mean(samples.x), np.where(saccade, x0, np.nan)),
+        "y_cord": np.where(fixation, mean(samples.y), np.where(saccade, y0, np.nan)),
+        "duration": time_stamp[last] - time_stamp[first] + samples.interval(),
+        "pupil": np.where(fixation, mean(samples.pupil), np.nan),
+        "x1_cord": np.where(saccade, x1, np.nan),
+        "y1_cord": np.where(saccade, y1, np.nan),
+        "amplitude": np.where(saccade, np.hypot(x1 - x0, y1 - y0), np.nan),
+        "peak_velocity": np.where(saccade, peak_velocity, np.nan),
+    }
+    return pd.DataFrame(columns, columns=HEADER)
+
+
+DETECTORS = {"I-VT": ivt, "I-DT": idt}
+
+
+def detect(samples, method="I-VT", **thresholds):
+    """eye_events() of the samples labelled by DETECTORS[method](samples, **thresholds)."""
+    labels, starts = DETECTORS[method](samples, **thresholds)
+    return eye_events(samples, labels, starts)
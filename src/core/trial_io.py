@@ -0,0 +1,221 @@
+"""
+Reading and writing trial files without the GUI.
+
+These are the readers and writers behind Fix8's trial list and its
+"Save Corrections" actions, so that the batch runner produces exactly the
+files the GUI would. Nothing in here imports PyQt5.
+
+Besides JSON and CSV, a trial can be stored as a .npy file: the eye_events
+table as one NumPy structured array, a typed field per column. Loading
+memory-maps the file and parses no text; convert_trial() converts between
+the three formats.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from .lazy import lazy_import
+
+# loaded on first use, see fix8.core
+pd = lazy_import("pandas")
+
+
+TRIAL_EXTENSIONS = (".json", ".csv", ".npy")
+
+
+def json_to_df(trial_path):
+    """Read a JSON trial into an eye_events DataFrame.
+
+    Parameters
+    ----------
+    trial_path : str
+        path of a trial in the new ({"fixations": ..., "time_stamps": ...})
+        or the old ({"0": [x, y, duration], ...}) JSON format
+
+    Returns
+    -------
+    pandas.DataFrame
+        columns x_cord, y_cord, duration, eye_event and, if the trial has
+        time stamps, time_stamp
+    """
+    x_cord = []
+    y_cord = []
+    duration = []
+
+    with open(trial_path, "r") as trial:
+
+        trial_data = json.load(trial)
+
+        if 'fixations' not in trial_data.keys():
+            # old JSON format
+            for key in trial_data:
+                x_cord.append(trial_data[key][0])
+                y_cord.append(trial_data[key][1])
+                duration.append(trial_data[key][2])
+        else:
+            # new JSON format
+            for fixation in trial_data["fixations"]:
+                x_cord.append(fixation[0])
+                y_cord.append(fixation[1])
+                duration.append(fixation[2])
+
+    # create an empty dataframe
+    eye_events = pd.DataFrame(columns=["x_cord", "y_cord", "duration"])
+    eye_events["x_cord"] = x_cord
+    eye_events["y_cord"] = y_cord
+    eye_events["duration"] = duration
+    eye_events["eye_event"] = "fixation"
+
+    if 'time_stamps' in trial_data.keys():
+        eye_events["time_stamp"] = trial_data["time_stamps"]
+
+    return eye_events
+
+
+def npy_to_df(trial_path):
+    """Read a .npy trial, written by write_trial_npy, into an eye_events DataFrame.
+
+    The file is memory-mapped copy-on-write, and the numeric columns of the
+    DataFrame are views of the mapping: only the pages that are used are
+    read, and changes to the DataFrame never reach the file. Text columns
+    are copied, with empty strings read back as NaN, as they were before
+    writing.
+    """
+    table = np.load(trial_path, mmap_mode="c", allow_pickle=False)
+    if table.dtype.names is None:
+        raise ValueError("not a Fix8 trial: " + trial_path)
+
+    columns = {}
+    for name in table.dtype.names:
+        values = table[name]
+        if values.dtype.kind == "U":
+            missing = values == ""
+            values = values.astype(object)
+            values[missing] = np.nan
+        columns[name] = values
+    return pd.DataFrame(columns, columns=list(table.dtype.names), copy=False)
+
+
+def read_eye_events(trial_path):
+    """Read a JSON, CSV or .npy trial into an eye_events DataFrame.
+
+    Raises
+    ------
+    ValueError
+        if the file is not in one of the TRIAL_EXTENSIONS formats
+    """
+    if trial_path.endswith(".json"):
+        return json_to_df(trial_path)
+    if trial_path.endswith(".csv"):
+        return pd.read_csv(trial_path)
+    if trial_path.endswith(".npy"):
+        return npy_to_df(trial_path)
+    raise ValueError("not a JSON, CSV or .npy trial: " + trial_path)
+
+
+def read_trial(trial_path):
+    """Read a JSON, CSV or .npy trial into an eye_events DataFrame.
+
+    Raises
+    ------
+    ValueError
+        if the file is not a trial, or has no fixations
+    """
+    eye_events = read_eye_events(trial_path)
+
+    if "eye_event" not in eye_events.columns or not (eye_events["eye_event"] == "fixation").any():
+        raise ValueError("no fixations found in " + trial_path)
+
+    return eye_events
+
+
+def corrected_file_name(trial_path, extension):
+    """Default name of the corrections of trial_path, as offered by the GUI."""
+    return os.path.splitext(trial_path)[0] + '_CORRECTED' + extension
+
+
+def write_corrections_json(eye_events, file_name):
+    """Write the fixations of eye_events in Fix8's JSON trial format."""
+    fixation_rows = eye_events["eye_event"] == "fixation"
+    fixations = np.array(eye_events[fixation_rows][["x_cord", "y_cord", "duration"]]).tolist()
+
+    if 'time_stamp' in eye_events.columns:
+        time_stamps = np.array(eye_events[fixation_rows]["time_stamp"]).tolist()
+        corrected_fixations = {'time_stamps': time_stamps,
+                               'fixations': fixations
+                              }
+    else:
+        corrected_fixations = {'fixations': fixations}
+
+    with open(f"{file_name}", "w") as f:
+        f.write(json.dumps(corrected_fixations))
+
+
+def write_corrections_csv(eye_events, file_name):
+    """Write eye_events as CSV, adding start/end time columns if it has time stamps.
+
+    Like the GUI, the start_time and end_time columns are added to
+    eye_events itself.
+    """
+    if 'time_stamp' in eye_events.columns:
+        eye_events["start_time"] = eye_events["time_stamp"]
+        eye_events["end_time"] = eye_events["time_stamp"] + eye_events["duration"]
+
+    eye_events.to_csv(file_name, index=False)
+
+
+def _column_array(column):
+    """A column of eye_events as a typed NumPy array for a .npy trial.
+
+    Text columns (object, category or string dtype) become fixed-width
+    unicode, with missing values as empty strings; nullable integer
+    columns with missing values become floats.
+
+    Raises
+    ------
+    ValueError
+        if a non-numeric column holds anything but strings and missing
+        values, which could not be read back as they were
+    """
+    if pd.api.types.is_numeric_dtype(column.dtype) or pd.api.types.is_bool_dtype(column.dtype):
+        if column.hasnans:
+            return column.to_numpy(dtype=float, na_value=np.nan)
+        return column.to_numpy(dtype=column.dtype.numpy_dtype if hasattr(column.dtype, "numpy_dtype") else None)
+    values = column.astype(object)
+    if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+        raise ValueError("column " + str(column.name) + " holds values other than text, cannot be written to a .npy trial")
+    return values.where(column.notna(), "").to_numpy(dtype=str)
+
+
+def write_trial_npy(eye_events, file_name):
+    """Write eye_events as a .npy trial: one structured array, a field per column."""
+    arrays = [_column_array(eye_events[name]) for name in eye_events.columns]
+    table = np.empty(len(eye_events), dtype=[(str(name), array.dtype) for name, array in zip(eye_events.columns, arrays)])
+    for name, array in zip(table.dtype.names, arrays):
+        table[name] = array
+
+    # written next to the target and moved over it, so that a trial that is
+    # memory-mapped elsewhere is never changed under it
+    temporary = file_name + ".part"
+    with open(temporary, "wb") as f:
+        np.save(f, table, allow_pickle=False)
+    os.replace(temporary, file_name)
+
+
+def convert_trial(trial_path, file_name):
+    """Convert a trial between the JSON, CSV and .npy formats, by file extension.
+
+    CSV and .npy keep every column; JSON keeps the fixations and their
+    time stamps, which is all the JSON trial format holds.
+    """
+    eye_events = read_eye_events(trial_path)
+    if file_name.endswith(".json"):
+        write_corrections_json(eye_events, file_name)
+    elif file_name.endswith(".csv"):
+        eye_events.to_csv(file_name, index=False)
+    elif file_name.endswith(".npy"):
+        write_trial_npy(eye_events, file_name)
+    else:
+        raise ValueError("not a JSON, CSV or .npy file name: " + file_name)
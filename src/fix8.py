@@ -23,8 +23,9 @@ correction methods for eye tracking data in reading tasks.
 (If you use Fix8 in academic research, please cite our paper)
 """
 
+import multiprocessing
 import time
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QColor
 
 # from PyQt5.QtWidgets import *
@@ -54,7 +55,12 @@ import copy
 from datetime import date
 from pathlib import Path
 
-from . import mini_emtk
+from .core import mini_emtk
+from .core import algorithms
+from .core import trial_io
+from .core import aoi_cache
+from .core import measures
+from .core import samples
 from .merge_fixations_dialog import MergeFixationsDialog
 from .generate_fixations_skip_dialog import GenerateFixationsSkipDialog
 from .outlier_metrics_dialog import OutlierMetricsDialog
@@ -93,11 +99,12 @@ class Fix8():
 
         # fields relating to AOIs
         self.aoi, self.background_color = None, None
+        self.aoi_cache = aoi_cache.AOICache()   # AOIs of stimuli seen before
+        self.aoi_margins_unsaved = False   # AOIs of margins being tuned are not cached yet
 
         # fields relating to the correction algorithm
         self.algorithm = "manual"
-        self.algorithm_function = None
-        self.secondary_algorithm_function = None
+        self.stimulus = None    # per-stimulus inputs shared by the algorithms
         self.suggested_corrections, self.suggested_fixation = None, None
 
         # keeps track of how many times file was saved so duplicates can be saved instead of overriding previous save file
@@ -134,6 +141,12 @@ class Fix8():
         self.fix8 = QApplication([])
         self.ui = ui_main_window.Ui_Main_Window(self)
 
+        # the AOI margins count as settled once they have not changed for a second
+        self.aoi_margins_timer = QTimer()
+        self.aoi_margins_timer.setSingleShot(True)
+        self.aoi_margins_timer.setInterval(1000)
+        self.aoi_margins_timer.timeout.connect(self.aoi_margins_settled)
+
         # hide/show side panel until a folder is opened
         self.ui.hide_side_panel()
 
@@ -153,7 +166,7 @@ class Fix8():
         self.state_history = History()
 
         # get aoi from the image
-        self.aoi, self.background_color = mini_emtk.EMTK_find_aoi(
+        self.aoi, self.background_color = self.aoi_cache.find_aoi(
             self.image_file_path,
             margin_height=self.aoi_height,
             margin_width=self.aoi_width,
@@ -207,7 +220,7 @@ class Fix8():
         self.state_history = History()
 
         # get aoi from the image
-        self.aoi, self.background_color = mini_emtk.EMTK_find_aoi(
+        self.aoi, self.background_color = self.aoi_cache.find_aoi(
             self.image_file_path,
             margin_height=self.aoi_height,
             margin_width=self.aoi_width,
@@ -262,7 +275,7 @@ class Fix8():
         self.state_history = History()
 
         # get aoi from the image
-        self.aoi, self.background_color = mini_emtk.EMTK_find_aoi(
+        self.aoi, self.background_color = self.aoi_cache.find_aoi(
             self.image_file_path,
             margin_height=self.aoi_height,
             margin_width=self.aoi_width,
@@ -318,7 +331,7 @@ class Fix8():
         self.state_history = History()
 
         # get aoi from the image
-        self.aoi, self.background_color = mini_emtk.EMTK_find_aoi(
+        self.aoi, self.background_color = self.aoi_cache.find_aoi(
             self.image_file_path,
             margin_height=self.aoi_height,
             margin_width=self.aoi_width,
@@ -471,14 +484,14 @@ class Fix8():
         self.save_state()
 
         # get aoi from the image
-        self.aoi, self.background_color = mini_emtk.EMTK_find_aoi(
+        self.aoi, self.background_color = self.aoi_cache.find_aoi(
             self.image_file_path,
             margin_height=self.aoi_height,
             margin_width=self.aoi_width,
         )
 
         # get line_Y from aoi
-        line_Y = mini_emtk.find_lines_y(self.aoi)
+        line_Y = self.current_stimulus().line_Y
 
         original_fixations = np.array(self.eye_events[['x_cord', 'y_cord', 'duration']])
         fixations = np.array(mini_emtk.error_shift(threshold, line_Y, original_fixations))
@@ -575,35 +588,8 @@ class Fix8():
         original_fixations = np.array(self.eye_events[['x_cord', 'y_cord', 'duration']])
         hit_test_data = mini_emtk.hit_test(original_fixations, self.trial_path, self.aoi, radius=radius)
 
-        single_fixation_duration = []
-        first_fixation_duration = []
-        gaze_duration = []
-        total_time = []
-        fixation_count = []
-
-        eye_metrics_data = self.aoi.copy()
-
-        for index, row in self.aoi.iterrows():
-            # get part and line from row index
-            token_line_part = self.aoi.loc[index, "name"]
-            line = int(token_line_part.split(" ")[1])
-            part = int(token_line_part.split(" ")[3])
-
-            # convert line and part columns in hit_test_data to int
-            hit_test_data['line'] = hit_test_data['line'].astype(int)
-            hit_test_data['part'] = hit_test_data['part'].astype(int)
-            
-            single_fixation_duration.append(mini_emtk.get_single_fixation_duration(hit_test_data, line, part))
-            first_fixation_duration.append(mini_emtk.get_first_fixation_duration(hit_test_data, line, part))
-            gaze_duration.append(mini_emtk.get_gaze_duration(hit_test_data, line, part))
-            total_time.append(mini_emtk.get_total_time(hit_test_data, line, part))
-            fixation_count.append(mini_emtk.get_fixation_count(hit_test_data, line, part))
-
-        eye_metrics_data['Single Fixation Duration'] = single_fixation_duration
-        eye_metrics_data['First Fixation Duration'] = first_fixation_duration
-        eye_metrics_data['Gaze Duration'] = gaze_duration
-        eye_metrics_data['Total Time'] = total_time
-        eye_metrics_data['Fixation Count'] = fixation_count
+        # all measures of all AOIs in one pass over the hits
+        eye_metrics_data = self.aoi.join(measures.aoi_measures(hit_test_data, self.aoi))
     
         # write eye metrics data to file
         eye_metrics_data.to_csv(file_name, index=False)
@@ -633,13 +619,13 @@ class Fix8():
         self.show_error_message("Warning", "Conversion may take a while")
 
         # convert and save csv file
-        mini_emtk.read_EyeLink1000(ascii_file, new_correction_file_name)
+        mini_emtk.read_EyeLink1000(ascii_file, new_correction_file_name, jobs=None)
 
 
     def json_to_csv_converter(self):
         # open json file through file dialog limit to .asc files
         qfd = QFileDialog()
-        json_file = qfd.getOpenFileName(self.ui, "Select Json file", "", "Json Files (*.json)")[0]
+        json_file = qfd.getOpenFileName(self.ui, "Select Json file", "", "Json or Binary Trials (*.json *.npy)")[0]
 
         if json_file == "":
             self.show_error_message("Error", "No file selected")
@@ -647,18 +633,24 @@ class Fix8():
 
         # ask user for file name to save csv through file dialog
         qfd = QFileDialog()
-        default_file_name = json_file.replace('.json', '') + '.csv'
-        new_correction_file_name, _ = qfd.getSaveFileName(self.ui, "Save converted CSV file", default_file_name)
+        default_file_name = json_file.replace('.json', '').replace('.npy', '') + '.csv'
+        new_correction_file_name, _ = qfd.getSaveFileName(self.ui, "Save converted CSV file", default_file_name,
+                                                          "CSV Files (*.csv);;Binary Trials (*.npy)")
         
         if new_correction_file_name == "":
             self.show_error_message("Error", "No file selected")
             return
 
-        if '.csv' not in new_correction_file_name:
+        if '.csv' not in new_correction_file_name and not new_correction_file_name.endswith('.npy'):
             new_correction_file_name += '.csv'
 
         self.show_error_message("Warning", "Conversion may take a while")
 
+        # binary trials keep every column, see trial_io
+        if json_file.endswith('.npy') or new_correction_file_name.endswith('.npy'):
+            trial_io.convert_trial(json_file, new_correction_file_name)
+            return
+
         # convert and save csv file
         dataframe = self.json_to_df(json_file)
         dataframe.to_csv(new_correction_file_name, index=False)
@@ -667,7 +659,7 @@ class Fix8():
     def csv_to_json_converter(self):
         # open csv file through file dialog limit to .asc files
         qfd = QFileDialog()
-        csv_file = qfd.getOpenFileName(self.ui, "Select CSV file", "", "CSV Files (*.csv)")[0]
+        csv_file = qfd.getOpenFileName(self.ui, "Select CSV file", "", "CSV or Binary Trials (*.csv *.npy)")[0]
 
         if csv_file == "":
             self.show_error_message("Error", "No file selected")
@@ -675,18 +667,24 @@ class Fix8():
 
         # ask user for file name to save csv through file dialog
         qfd = QFileDialog()
-        default_file_name = csv_file.replace('.csv', '') + '.json'
-        new_correction_file_name, _ = qfd.getSaveFileName(self.ui, "Save converted json file", default_file_name)
+        default_file_name = csv_file.replace('.csv', '').replace('.npy', '') + '.json'
+        new_correction_file_name, _ = qfd.getSaveFileName(self.ui, "Save converted json file", default_file_name,
+                                                          "Json Files (*.json);;Binary Trials (*.npy)")
         
         if new_correction_file_name == "":
             self.show_error_message("Error", "No file selected")
             return
 
-        if '.json' not in new_correction_file_name:
+        if '.json' not in new_correction_file_name and not new_correction_file_name.endswith('.npy'):
             new_correction_file_name += '.json'
 
         self.show_error_message("Warning", "Conversion may take a while")
 
+        # binary trials keep every column, see trial_io
+        if csv_file.endswith('.npy') or new_correction_file_name.endswith('.npy'):
+            trial_io.convert_trial(csv_file, new_correction_file_name)
+            return
+
         # convert and save csv file
         dataframe = pd.read_csv(csv_file)
 
@@ -718,7 +716,50 @@ class Fix8():
             return
 
         self.show_error_message("Warning", "Conversion may take a while")
-        mini_emtk.read_EyeLink1000_experiment(ascii_file, save_folder, runtime_folder=runtime_folder)
+        mini_emtk.read_EyeLink1000_experiment(ascii_file, save_folder, runtime_folder=runtime_folder, jobs=None)
+
+    def samples_to_csv_converter(self):
+        ''' detect fixations in the raw gaze samples of an ASCII file or a timestamp,x,y CSV file '''
+        qfd = QFileDialog()
+        samples_file = qfd.getOpenFileName(self.ui, "Select samples file", "", "Samples (*.asc *.csv)")[0]
+
+        if samples_file == "":
+            self.show_error_message("Error", "No file selected")
+            return
+
+        method, ok = QInputDialog.getItem(self.ui, "Fixation Detection", "Detection method", list(samples.DETECTORS), 0, False)
+        if not ok:
+            return
+
+        if method == "I-VT":
+            threshold, ok = QInputDialog.getDouble(self.ui, "I-VT", "Velocity threshold (pixels per second)", 2000, 1, 100000)
+            thresholds = {"velocity_threshold": threshold}
+        else:
+            threshold, ok = QInputDialog.getDouble(self.ui, "I-DT", "Dispersion threshold (pixels)", 25, 1, 1000)
+            thresholds = {"dispersion_threshold": threshold}
+
+        if not ok:
+            return
+
+        # ask user for file name to save csv through file dialog
+        qfd = QFileDialog()
+        default_file_name = samples_file.rsplit('.', 1)[0] + '_' + method + '.csv'
+        new_file_name, _ = qfd.getSaveFileName(self.ui, "Save converted CSV file", default_file_name)
+
+        if new_file_name == "":
+            self.show_error_message("Error", "No file selected")
+            return
+
+        if '.csv' not in new_file_name:
+            new_file_name += '.csv'
+
+        try:
+            eye_events = samples.detect(samples.read_samples(samples_file), method, **thresholds)
+        except (KeyError, ValueError) as error:
+            self.show_error_message("Error", "Could not read the samples of " + samples_file + ": " + str(error))
+            return
+
+        eye_events.to_csv(new_file_name)
 
     def outlier_duration_filter(self):
         minimum_value = 0.1
@@ -1003,46 +1044,39 @@ class Fix8():
         new_metrics_data.to_csv(new_metrics_file, index=False)
 
 
+    def current_stimulus(self):
+        """the algorithms.Stimulus of the current AOIs, built once per set of AOIs"""
+        if self.stimulus is None or self.stimulus.aoi is not self.aoi:
+            self.stimulus = algorithms.Stimulus(self.aoi)
+        return self.stimulus
+
+
     def run_correction(self):
 
         original_fixations = np.array(self.eye_events[['x_cord', 'y_cord', 'duration']])
         fixation_XY = original_fixations
         fixation_XY = fixation_XY[:, 0:2]
         fixation_XY = np.array(fixation_XY)
-        line_Y = mini_emtk.find_lines_y(self.aoi)
-        line_Y = np.array(line_Y)
-        word_XY = mini_emtk.find_word_centers(self.aoi)
-        word_XY = np.array(word_XY)
         self.suggested_corrections = original_fixations
 
-        # run algorithm, warp uses word_xy, others use line_Y
-        if "warp" not in self.algorithm:
-            self.suggested_corrections[:, 0:2] = self.algorithm_function(fixation_XY, line_Y)
-        
-        elif "+" in self.algorithm:
-            # hybrid
-            self.suggested_corrections[:, 0:2] = self.algorithm_function(fixation_XY, line_Y, word_XY, self.secondary_algorithm_function)
+        # the registry passes each algorithm the inputs it declares
+        algorithm = algorithms.get(self.algorithm)
+        self.suggested_corrections[:, 0:2] = algorithm.run(fixation_XY, self.current_stimulus())
 
-        else:
-            # warp
-            self.suggested_corrections[:, 0:2] = self.algorithm_function(fixation_XY, word_XY)
-        
         self.status_text = self.algorithm + " Algorithm Selected"
         self.ui.statusBar.showMessage(self.status_text)
         self.ui.relevant_buttons("algorithm_selected")
 
 
-    def run_algorithm(self, algorithm_name, algorithm_function, mode, secondery_algorithm_function=None):
+    def run_algorithm(self, algorithm_name, mode):
 
         self.algorithm = algorithm_name
-        self.algorithm_function = algorithm_function
-        self.secondary_algorithm_function = secondery_algorithm_function
         self.run_correction()
 
         # write metadata
         self.metadata += ("selected, algorithm " + str(self.algorithm) + "," + str(time.time()) + "\n")
 
-        if mode == 'semi':
+        if mode == algorithms.SEMI:
             # show suggestion
             self.ui.checkbox_show_suggestion.setCheckable(True)
             self.ui.checkbox_show_suggestion.setEnabled(True)
@@ -1061,8 +1095,6 @@ class Fix8():
 
 
     def manual_correction(self):
-        self.algorithm_function = None
-        self.secondary_algorithm_function = None
         self.algorithm = "manual"
 
         # write metadata
@@ -1257,7 +1289,7 @@ class Fix8():
             self.assign_fixation_below()
 
         # spacebar: accept and next is 32
-        if e.key() == 32 and self.algorithm_function != None:
+        if e.key() == 32 and self.algorithm != "manual":
             self.metadata += "key,accept suggestion," + str(time.time()) + "\n"
             self.confirm_suggestion()
 
@@ -1277,7 +1309,7 @@ class Fix8():
         # find the closest line above the current fixation
         if self.aoi is not None:
             
-            line_Y = mini_emtk.find_lines_y(self.aoi)
+            line_Y = self.current_stimulus().line_Y
 
             if line_number-1 >= len(line_Y):
                 return
@@ -1342,7 +1374,7 @@ class Fix8():
             if len(files) > 0:
                 self.file_list = []
                 for file in files:
-                    if file.endswith(".json") or file.endswith(".csv") and file.endswith("_AOI.csv") == False and file.endswith("_hit_test.csv") == False:
+                    if file.endswith((".json", ".npy")) or file.endswith(".csv") and file.endswith("_AOI.csv") == False and file.endswith("_hit_test.csv") == False:
                         self.file_list.append(self.folder_path + "/" + file)
 
                     elif (file.endswith(".png")
@@ -1405,7 +1437,7 @@ class Fix8():
 
     def open_trial(self):
         qfd = QFileDialog()
-        self.trial_path = qfd.getOpenFileName(self.ui, "Select Trial file", "", "CSV or Json (*.csv *.json)")[0]
+        self.trial_path = qfd.getOpenFileName(self.ui, "Select Trial file", "", "CSV, Json or Binary Trials (*.csv *.json *.npy)")[0]
 
         if self.trial_path == "":
             self.show_error_message("Error", "No file selected")
@@ -1430,12 +1462,20 @@ class Fix8():
                 self.trial_name = None
                 self.trial_path = None
                 return
+
+        elif self.trial_path.endswith(".npy"):
+            ok = self.read_npy_fixations(self.trial_path)
+            if not ok:
+                self.trial_name = None
+                self.trial_path = None
+                return
         
         # clear history for undo
         self.state_history = History()
 
         self.suggested_corrections = None
         self.current_fixation = (len(self.eye_events)-1)  
+        self.aoi_margins_settled()
 
         # set the progress bar to the amount of fixations found
         self.ui.progress_bar.setMaximum(len(self.eye_events) - 1)
@@ -1550,11 +1590,19 @@ class Fix8():
                 self.trial_path = None
                 return
 
+        elif self.trial_path.endswith(".npy"):
+            ok = self.read_npy_fixations(self.trial_path)
+            if not ok:
+                self.trial_name = None
+                self.trial_path = None
+                return
+
         # clear history for undo
         self.state_history = History()
 
         self.suggested_corrections = None
         self.current_fixation = (len(self.eye_events)-1)  
+        self.aoi_margins_settled()
 
         # set the progress bar to the amount of fixations found
         self.ui.progress_bar.setMaximum(len(self.eye_events) - 1)
@@ -1581,55 +1629,28 @@ class Fix8():
         self.update_trial_statistics()
 
 
-    def find_aoi(self):
-        """find the areas of interest (aoi) for the selected stimulus"""
+    def find_aoi(self, write=True):
+        """find the areas of interest (aoi) for the selected stimulus
+        parameters:
+        write - whether newly detected AOIs are added to the AOI cache"""
 
         try:
             if self.image_file_path != "":
-                self.aoi, self.background_color = mini_emtk.EMTK_find_aoi(
+                self.aoi, self.background_color = self.aoi_cache.find_aoi(
                     self.image_file_path,
                     margin_height=self.aoi_height,
                     margin_width=self.aoi_width,
+                    write=write,
                 )
+                self.aoi_margins_unsaved = not write
         except Exception as e:
             self.show_error_message("AOI Error", "Problem finding AOI: " + str(e))
             self.aoi = None
 
 
     def json_to_df(self, trial_path):
-        x_cord = []
-        y_cord = []
-        duration = []
-
-        with open(trial_path, "r") as trial:
+        return trial_io.json_to_df(trial_path)
 
-            trial_data = json.load(trial)
-
-            if 'fixations' not in trial_data.keys():
-                # old JSON format
-                for key in trial_data:
-                    x_cord.append(trial_data[key][0])
-                    y_cord.append(trial_data[key][1])
-                    duration.append(trial_data[key][2])
-            else:
-                # new JSON format
-                for fixation in trial_data["fixations"]:
-                    x_cord.append(fixation[0])
-                    y_cord.append(fixation[1])
-                    duration.append(fixation[2])
-
-        # create an empty dataframe
-        eye_events = pd.DataFrame(columns=["x_cord", "y_cord", "duration"])
-        eye_events["x_cord"] = x_cord
-        eye_events["y_cord"] = y_cord
-        eye_events["duration"] = duration
-        eye_events["eye_event"] = "fixation"
-
-        if 'time_stamps' in trial_data.keys():
-            eye_events["time_stamp"] = trial_data["time_stamps"]
-
-        return eye_events
-    
 
     def read_json_fixations(self, trial_path):
         """find all the fixations of the trial that was double clicked
@@ -1651,6 +1672,27 @@ class Fix8():
         return True
 
 
+    def read_npy_fixations(self, trial_path):
+        """find all the fixations of a binary (.npy) trial
+        parameters:
+        trial_path - the trial file path of the trial clicked on"""
+
+        try:
+            self.eye_events = trial_io.npy_to_df(trial_path)
+            fixations = self.eye_events[self.eye_events["eye_event"] == "fixation"]
+        except:
+            self.show_error_message("Trial File Error", "Problem reading binary trial File")
+            return False
+
+        # if the fixations are empty, show an error message
+        if len(fixations) == 0:
+            self.show_error_message("Trial File Error", "No Fixations Found")
+            return False
+
+        self.ui.relevant_buttons("trial_clicked")
+        return True
+
+
     def read_csv_fixations(self, trial_path):
         """find all the fixations of the trial that was double clicked
         parameters:
@@ -1793,11 +1835,9 @@ class Fix8():
         if self.ui.checkbox_show_aoi.isChecked():
             color = self.aoi_color 
 
-            for row in self.aoi.iterrows():
-                xcord = row[1]["x"]
-                ycord = row[1]["y"]
-                height = row[1]["height"]
-                width = row[1]["width"]
+            layout = self.current_stimulus().layout
+            for xcord, ycord, x1, y1 in zip(layout.x0, layout.y0, layout.x1, layout.y1):
+                width, height = x1 - xcord, y1 - ycord
                 aoi_box = self.ui.canvas.ax.add_patch(
                     Rectangle(
                         (xcord, ycord),
@@ -1902,13 +1942,10 @@ class Fix8():
 
         # draw aois
         if self.ui.checkbox_show_aoi.isChecked():
-            for row in self.aoi.iterrows():
+            layout = self.current_stimulus().layout
+            for xcord, ycord, x1, y1 in zip(layout.x0, layout.y0, layout.x1, layout.y1):
+                width, height = x1 - xcord, y1 - ycord
 
-                xcord = row[1]["x"]
-                ycord = row[1]["y"]
-                height = row[1]["height"]
-                width = row[1]["width"]
-                
                 aoi_box = self.ui.canvas.ax.add_patch(
                     Rectangle(
                         (xcord, ycord),
@@ -1973,20 +2010,8 @@ class Fix8():
         # find the closest line above the current fixation
         if self.aoi is not None:
             
-            line_Y = mini_emtk.find_lines_y(self.aoi)
-
-            distances = []
-            for line in line_Y:
-                current_distance = self.eye_events[self.eye_events["eye_event"] == "fixation"]["y_cord"].iloc[self.current_fixation] - line
-                distances.append(current_distance)
-
-            closest_line = line_Y[0]
-
-            smallest_distance = 9999999
-            for index, distance in enumerate(distances):
-                if distance < smallest_distance and line_Y[index] < self.eye_events[self.eye_events["eye_event"] == "fixation"]["y_cord"].iloc[self.current_fixation]:
-                    smallest_distance = distance
-                    closest_line = line_Y[index]
+            fixation_y = self.eye_events[self.eye_events["eye_event"] == "fixation"]["y_cord"].iloc[self.current_fixation]
+            closest_line = self.current_stimulus().layout.line_above(fixation_y)
 
             self.eye_events.loc[self.current_fixation, "y_cord"] = closest_line
             self.quick_draw_canvas(all_fixations=False)
@@ -1999,20 +2024,8 @@ class Fix8():
 
         # find the closest line below the current fixation
         if self.aoi is not None:
-            line_Y = mini_emtk.find_lines_y(self.aoi)
-
-            distances = []
-            for line in line_Y:
-                current_distance = abs(self.eye_events[self.eye_events["eye_event"] == "fixation"]["y_cord"].iloc[self.current_fixation] - line)
-                distances.append(current_distance)
-
-            closest_line = line_Y[-1]
-
-            smallest_distance = 9999999
-            for index, distance in enumerate(distances):
-                if distance < smallest_distance and line_Y[index] > self.eye_events[self.eye_events["eye_event"] == "fixation"]["y_cord"].iloc[self.current_fixation]:
-                    smallest_distance = distance
-                    closest_line = line_Y[index]
+            fixation_y = self.eye_events[self.eye_events["eye_event"] == "fixation"]["y_cord"].iloc[self.current_fixation]
+            closest_line = self.current_stimulus().layout.line_below(fixation_y)
 
             self.eye_events.loc[self.current_fixation, "y_cord"] = closest_line
             self.quick_draw_canvas(all_fixations=False)
@@ -2023,10 +2036,7 @@ class Fix8():
     def confirm_suggestion(self):
         """ when the confirm button is clicked, the suggested correction replaces the current fixation"""
 
-        if self.algorithm_function is None:
-            return
-
-        if self.suggested_corrections is None:
+        if self.algorithm == "manual" or self.suggested_corrections is None:
             return
 
         self.metadata += (
@@ -2069,7 +2079,7 @@ class Fix8():
         """ save correction to a json file and metadata to csv file """
 
         qfd = QFileDialog()
-        default_file_name = self.trial_path.replace('.json', '') + '_CORRECTED.json'
+        default_file_name = trial_io.corrected_file_name(self.trial_path, '.json')
         new_correction_file_name, _ = qfd.getSaveFileName(self.ui, "Save correction", default_file_name)
 
         if new_correction_file_name == "":
@@ -2080,25 +2090,9 @@ class Fix8():
             new_correction_file_name += '.json'
 
         if len(self.eye_events) > 0:
-            
-            x_cord = []
-            y_cord = []
-            duration = []
-            time_stamps = []
-
-            fixations = np.array(self.eye_events[self.eye_events["eye_event"] == "fixation"][["x_cord", "y_cord", "duration"]]).tolist()
-
-            if 'time_stamp' in self.eye_events.columns:
-                time_stamps = np.array(self.eye_events[self.eye_events["eye_event"] == "fixation"]["time_stamp"]).tolist()
-                corrected_fixations = {'time_stamps': time_stamps,
-                                       'fixations': fixations
-                                      }
-            else:
-                corrected_fixations = {'fixations': fixations}
 
-            with open(f"{new_correction_file_name}", "w") as f:
-                json.dump(corrected_fixations, f)
-                
+            trial_io.write_corrections_json(self.eye_events, new_correction_file_name)
+
             duration = (time.time() - self.timer_start)
             today = date.today()
 
@@ -2127,7 +2121,7 @@ class Fix8():
 
     def save_corrections_csv(self):
         qfd = QFileDialog()
-        default_file_name = self.trial_path.replace('.csv', '') + '_CORRECTED.csv'
+        default_file_name = trial_io.corrected_file_name(self.trial_path, '.csv')
         new_correction_file_name, _ = qfd.getSaveFileName(self.ui, "Save correction", default_file_name)
 
         if new_correction_file_name == "":
@@ -2139,20 +2133,9 @@ class Fix8():
 
         if len(self.eye_events) > 0:
 
-            # add start/end time columns if data has time_stamp
-            if 'time_stamp' in self.eye_events.columns:
-                start_times = []
-                end_times = []
-
-                for index, row in self.eye_events.iterrows():
-                    start_times.append(row["time_stamp"])
-                    end_times.append(row["time_stamp"] + row["duration"])
-
-                self.eye_events["start_time"] = start_times
-                self.eye_events["end_time"] = end_times
+            # adds start/end time columns if data has time_stamp
+            trial_io.write_corrections_csv(self.eye_events, new_correction_file_name)
 
-            self.eye_events.to_csv(new_correction_file_name, index=False)
-                
             duration = (time.time() - self.timer_start)
             today = date.today()
 
@@ -2256,16 +2239,28 @@ class Fix8():
 
     def aoi_height_changed(self, value):
         self.aoi_height = value
-        self.find_aoi()
+        # every step of the spin box is redrawn, but only the margins
+        # settled on are written to the AOI cache
+        self.find_aoi(write=False)
+        self.aoi_margins_timer.start()
         self.quick_draw_canvas()
 
 
     def aoi_width_changed(self, value):
         self.aoi_width = value
-        self.find_aoi()
+        self.find_aoi(write=False)
+        self.aoi_margins_timer.start()
         self.quick_draw_canvas()
 
 
+    def aoi_margins_settled(self):
+        """write the AOIs of the current margins to the AOI cache, when they are no
+        longer being tuned or a trial is loaded"""
+        self.aoi_margins_timer.stop()
+        if self.aoi_margins_unsaved:
+            self.find_aoi()
+
+
     def select_fixation_color(self):
         color = QColorDialog.getColor(initial=QColor(self.fixation_color))
         if color.isValid():
@@ -2363,6 +2358,10 @@ class Fix8():
 
 
 def main():
+    # the converters parse in worker processes, which frozen executables
+    # start through the main program
+    multiprocessing.freeze_support()
+
     if platform.system() == "Windows":
         import ctypes
 
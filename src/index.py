@@ -0,0 +1,145 @@
+"""
+fix8-index: precompute the AOIs of every stimulus image of a dataset.
+
+All images below the dataset folder are hashed, identical images (the same
+stimulus copied into every trial folder) are detected once per distinct
+content in a process pool, and the result is written to one index file at
+the root of the dataset (see fix8.core.aoi_index). The GUI and fix8-batch
+then read the AOIs of any image of the dataset from the index.
+
+Running it again only hashes new or modified images and only detects
+AOIs that are not in the index yet, e.g. for other margins.
+
+usage: fix8-index DATASET [--level LEVEL] [--aoi-width W] [--aoi-height H] [--jobs N]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .core import aoi_cache
+from .core import aoi_index
+from .core import mini_emtk
+
+
+def find_images(dataset):
+    """All stimulus images below dataset, in walk order."""
+    images = []
+    for folder, subfolders, files in os.walk(dataset):
+        subfolders.sort()
+        images += [os.path.join(folder, f) for f in sorted(files) if f.lower().endswith(aoi_cache.IMAGE_EXTENSIONS)]
+    return images
+
+
+def hash_images(image_paths):
+    """[(path, content hash)] of a chunk of images; runs in a worker process."""
+    return [(path, aoi_cache.image_hash(path)) for path in image_paths]
+
+
+def detect_aoi(job):
+    """AOI rows and background color of one image; runs in a worker process.
+
+    Returns (entry key, entry or None, error message or None).
+    """
+    image, key, level, margin_height, margin_width = job
+    try:
+        aoi, bg_color = mini_emtk.EMTK_find_aoi(image, level=level, margin_height=margin_height, margin_width=margin_width)
+    except Exception as error:
+        return key, None, str(error)
+    rows = aoi[aoi_cache.AOI_COLUMNS[:-1]].values.tolist()
+    return key, {"rows": rows, "background_color": bg_color}, None
+
+
+def chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def build_index(dataset, level="sub-line", margin_height=4, margin_width=7, executor=None):
+    """Bring the index of dataset up to date for the given AOI settings.
+
+    Hashing and detection run through executor.map (serially without one).
+
+    Returns (index, number of AOI tables detected, list of (image, error message)).
+    """
+    index_path = os.path.join(dataset, aoi_index.INDEX_FILE_NAME)
+    try:
+        index = aoi_index.AOIIndex.load(index_path)
+    except (OSError, ValueError, KeyError):
+        index = aoi_index.AOIIndex(os.path.abspath(dataset))
+
+    parallel_map = executor.map if executor is not None else map
+    images = find_images(dataset)
+    known = {}
+    stale = []
+    for image in images:
+        status = os.stat(image)
+        record = index.images.get(index.relative_path(image))
+        if record is not None and record[1:] == [status.st_size, status.st_mtime_ns]:
+            known[image] = record[0]
+        else:
+            stale.append(image)
+    # images that are no longer in the dataset are dropped from the index
+    index.images = {index.relative_path(image): index.images[index.relative_path(image)] for image in known}
+
+    for hashed in parallel_map(hash_images, chunks(stale, 32)):
+        for image, content_hash in hashed:
+            index.add_image(image, content_hash)
+            known[image] = content_hash
+
+    # one detection per distinct image content
+    jobs = {}
+    for image in images:
+        key = aoi_index.entry_key(known[image], level, margin_height, margin_width)
+        if key not in index.entries and key not in jobs:
+            jobs[key] = (image, key, level, margin_height, margin_width)
+
+    errors = []
+    detected = 0
+    for key, entry, error in parallel_map(detect_aoi, jobs.values()):
+        if error is not None:
+            errors.append((jobs[key][0], error))
+        else:
+            index.entries[key] = entry
+            detected += 1
+
+    # entries of contents that no image has anymore are dropped
+    hashes = set(known.values())
+    index.entries = {key: entry for key, entry in index.entries.items() if key.split("_", 1)[0] in hashes}
+    index.save(index_path)
+    return index, detected, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fix8-index",
+        description="Precompute the AOIs of all stimulus images of a dataset into one index file.",
+    )
+    parser.add_argument("dataset", help="root folder of the dataset")
+    parser.add_argument("--level", choices=("sub-line", "line"), default="sub-line", help="AOI level (default: sub-line)")
+    parser.add_argument("--aoi-width", type=int, default=7, help="AOI margin width (default: 7)")
+    parser.add_argument("--aoi-height", type=int, default=4, help="AOI margin height (default: 4)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: number of CPUs)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.dataset):
+        parser.error(args.dataset + " is not a folder")
+
+    if args.jobs is not None and args.jobs <= 1:
+        index, detected, errors = build_index(args.dataset, args.level, args.aoi_height, args.aoi_width)
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            index, detected, errors = build_index(
+                args.dataset, args.level, args.aoi_height, args.aoi_width, executor=executor
+            )
+
+    for image, error in errors:
+        print("failed: " + image + ": " + error, file=sys.stderr)
+    print(str(len(index.images)) + " images, " + str(len(set(h for h, _, _ in index.images.values())))
+          + " distinct, " + str(detected) + " AOI tables detected, " + str(len(errors)) + " failed", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
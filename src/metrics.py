@@ -0,0 +1,237 @@
+"""
+fix8-metrics: AOI reading measures of every trial of a dataset, in one table.
+
+Stimuli and trials are found like fix8-batch does. Worker processes run the
+hit test and fix8.core.measures on every trial, and the rows are appended to
+a single long-format CSV as trials finish, one row per (participant, trial,
+stimulus, line, part) with the measures as columns. Nothing is kept in
+memory after a trial has been written.
+
+Next to the CSV, <output>.done lists the finished trials with the size of
+the CSV after each one. An interrupted run started again with the same
+output continues where it stopped: the CSV is cut back to the last finished
+trial and only the remaining trials are computed.
+
+usage: fix8-metrics DATASET --output metrics.csv [--radius R] [--corrected {exclude,include,only}] [--jobs N]
+"""
+
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from .batch import CORRECTED_CHOICES, find_stimuli
+from .core import aoi_cache
+from .core import measures
+from .core import mini_emtk
+from .core import trial_io
+from .core.layout import StimulusLayout
+
+
+KEY_COLUMNS = ["participant", "trial", "stimulus", "line", "part", "trial_file"]
+COLUMNS = KEY_COLUMNS + measures.MEASURES
+
+
+def trial_identity(trial_path):
+    """(participant, trial) from a trial's file name.
+
+    Understands trial_<T>_participant_<P>_... (AlMadi2018, Carr2022, GazeBase,
+    EMIP2021) and <P>_<name>.json (MET_Dataset); otherwise the participant is
+    empty and the trial is the file name without extension.
+    """
+    name = os.path.splitext(os.path.basename(trial_path))[0]
+    match = re.match(r"trial_([^_]+)_participant_([^_]+)", name)
+    if match:
+        return match.group(2), match.group(1)
+    match = re.match(r"(\d+)_", name)
+    if match:
+        return match.group(1), name
+    return "", name
+
+
+def trial_rows(trial_path, relative_path, stimulus, aoi, layout, radius):
+    """The CSV rows of one trial, as text."""
+    eye_events = trial_io.read_trial(trial_path)
+    fixations = eye_events[eye_events["eye_event"] == "fixation"]
+    hits = mini_emtk.hit_test(np.array(fixations[["x_cord", "y_cord", "duration"]]), trial_path, aoi, radius=radius)
+    table = measures.aoi_measures(hits, aoi, layout)
+
+    participant, trial = trial_identity(trial_path)
+    table.insert(0, "participant", participant)
+    table.insert(1, "trial", trial)
+    table.insert(2, "stimulus", stimulus)
+    table.insert(3, "line", layout.line_ids)
+    table.insert(4, "part", layout.part_ids)
+    table.insert(5, "trial_file", relative_path)
+
+    text = io.StringIO()
+    table.to_csv(text, header=False, index=False, lineterminator="\n")
+    return text.getvalue()
+
+
+def measure_stimulus(job):
+    """Measure the trials of one stimulus; runs in a worker process.
+
+    Returns a list of (relative trial path, CSV text or None, error message or None).
+    """
+    image, trial_paths, options = job
+    relative_paths = [os.path.relpath(path, options["dataset"]) for path in trial_paths]
+    try:
+        find_aoi = mini_emtk.EMTK_find_aoi
+        if options["aoi_cache"] is not False:
+            find_aoi = aoi_cache.AOICache(options["aoi_cache"]).find_aoi
+        aoi, _ = find_aoi(image, margin_height=options["aoi_height"], margin_width=options["aoi_width"])
+    except Exception as error:
+        return [(path, None, "AOI error in " + image + ": " + str(error)) for path in relative_paths]
+
+    stimulus = os.path.splitext(os.path.basename(image))[0]
+    layout = StimulusLayout(aoi)
+    results = []
+    for trial_path, relative_path in zip(trial_paths, relative_paths):
+        try:
+            rows = trial_rows(trial_path, relative_path, stimulus, aoi, layout, options["radius"])
+        except Exception as error:
+            results.append((relative_path, None, str(error)))
+            continue
+        results.append((relative_path, rows, None))
+    return results
+
+
+def progress_path(output):
+    return output + ".done"
+
+
+def resume(output):
+    """Trials already in output, after cutting off anything written after the last finished one.
+
+    None if there is nothing to resume: no progress records, or a progress
+    file left behind by an output that is gone, which is removed.
+    """
+    done = set()
+    size = None
+    try:
+        with open(progress_path(output), newline="") as progress:
+            for record in csv.reader(progress, delimiter="\t"):
+                if len(record) == 2:
+                    done.add(record[0])
+                    size = int(record[1])
+    except FileNotFoundError:
+        pass
+    if size is None:
+        return None
+    try:
+        with open(output, "r+b") as f:
+            if f.seek(0, os.SEEK_END) < size:
+                # not the file the progress records were written for
+                return None
+            f.truncate(size)
+    except FileNotFoundError:
+        os.remove(progress_path(output))
+        return None
+    return done
+
+
+def run_jobs(jobs, n_jobs):
+    """Yield the results of measure_stimulus as jobs finish, with a bounded number of jobs in flight."""
+    if n_jobs is not None and n_jobs <= 1:
+        yield from map(measure_stimulus, jobs)
+        return
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        in_flight = set()
+        max_in_flight = 2 * (n_jobs or os.cpu_count() or 1)
+        while True:
+            for job in jobs:
+                in_flight.add(executor.submit(measure_stimulus, job))
+                if len(in_flight) >= max_in_flight:
+                    break
+            if not in_flight:
+                return
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fix8-metrics",
+        description="Compute the AOI reading measures of all trials of a dataset into one CSV table.",
+    )
+    parser.add_argument("dataset", help="root folder of the dataset")
+    parser.add_argument("-o", "--output", required=True, help="CSV file to write (resumed if it exists)")
+    parser.add_argument("-r", "--radius", type=int, default=10, help="hit test radius in pixels (default: 10)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--aoi-width", type=int, default=7, help="AOI margin width (default: 7)")
+    parser.add_argument("--aoi-height", type=int, default=4, help="AOI margin height (default: 4)")
+    parser.add_argument("--aoi-cache", default=None, metavar="DIR",
+                        help="AOI cache folder (default: " + aoi_cache.default_cache_directory() + ")")
+    parser.add_argument("--no-aoi-cache", action="store_true", help="always detect AOIs from the images")
+    parser.add_argument("--corrected", choices=CORRECTED_CHOICES, default="exclude",
+                        help="whether to measure the corrections written by fix8-batch (*_CORRECTED.*) "
+                             "instead of the trials (only), as well (include), or not (default: exclude)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="trials per job (default: 64)")
+    parser.add_argument("--overwrite", action="store_true", help="start over instead of resuming")
+    args = parser.parse_args(argv)
+
+    stimuli = find_stimuli(args.dataset, args.corrected)
+    if not stimuli:
+        parser.error("no folders with a stimulus image and trials found in " + args.dataset)
+
+    done = None
+    if not args.overwrite:
+        done = resume(args.output)
+        if done is None and os.path.exists(args.output):
+            parser.error(args.output + " exists and was not written by fix8-metrics, use --overwrite to replace it")
+    if done is None:
+        done = set()
+        with open(args.output, "w", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerow(COLUMNS)
+        # the first record is the header, so that resuming before the first
+        # trial finished cuts back to it
+        with open(progress_path(args.output), "w", newline="") as progress:
+            progress.write("\t" + str(os.path.getsize(args.output)) + "\n")
+
+    options = {
+        "dataset": args.dataset,
+        "radius": args.radius,
+        "aoi_width": args.aoi_width,
+        "aoi_height": args.aoi_height,
+        "aoi_cache": False if args.no_aoi_cache else args.aoi_cache,
+    }
+    chunk_size = max(args.chunk_size, 1)
+    jobs = []
+    skipped = 0
+    for image, trial_paths in stimuli:
+        remaining = [path for path in trial_paths if os.path.relpath(path, args.dataset) not in done]
+        skipped += len(trial_paths) - len(remaining)
+        for start in range(0, len(remaining), chunk_size):
+            jobs.append((image, remaining[start:start + chunk_size], options))
+
+    measured = failed = 0
+    with open(args.output, "ab") as f, open(progress_path(args.output), "a", newline="") as progress:
+        for results in run_jobs(jobs, args.jobs):
+            for relative_path, rows, error in results:
+                if error is not None:
+                    failed += 1
+                    print("failed: " + relative_path + ": " + error, file=sys.stderr)
+                    continue
+                f.write(rows.encode("utf-8"))
+                f.flush()
+                # the trial counts as done once its rows are in the file
+                progress.write(relative_path + "\t" + str(f.tell()) + "\n")
+                progress.flush()
+                measured += 1
+
+    print(str(measured) + " trials measured, " + str(skipped) + " skipped (already in " + args.output + "), "
+          + str(failed) + " failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,8 +23,7 @@ from PyQt5.QtWidgets import (
 )
 
 from . import canvas_resources
-from . import driftAlgorithms as drift
-from . import correction
+from .core import algorithms
 
 class Ui_Main_Window(QMainWindow, QtStyleTools):
     def __init__(self, fix8):
@@ -449,35 +448,13 @@ class Ui_Main_Window(QMainWindow, QtStyleTools):
         self.outside_screen_filter_action = QAction("Outside Screen", self)
 
         self.manual_correction_action = QAction("Manual", self)
-        self.warp_auto_action = QAction("Warp", self)
-        self.attach_auto_action = QAction("Attach", self)
-        self.chain_auto_action = QAction("Chain", self)
-        self.cluster_auto_action = QAction("Cluster", self)
-        self.merge_auto_action = QAction("Merge", self)
-        self.regress_auto_action = QAction("Regress", self)
-        self.segment_auto_action = QAction("Segment", self)
-        self.stretch_auto_action = QAction("Stretch", self)
-        self.slice_auto_action = QAction("Slice", self)
-        
-        self.warp_attach_auto_action = QAction("Warp+Attach", self)
-        self.warp_chain_auto_action = QAction("Warp+Chain", self)
-        self.war_regress_auto_action = QAction("Warp+Regress", self)
-        self.warp_stretch_auto_action = QAction("Warp+Stretch", self)
-
-        self.warp_semi_action = QAction("Warp", self)
-        self.attach_semi_action = QAction("Attach", self)
-        self.chain_semi_action = QAction("Chain", self)
-        self.cluster_semi_action = QAction("Cluster", self)
-        self.merge_semi_action = QAction("Merge", self)
-        self.regress_semi_action = QAction("Regress", self)
-        self.segment_semi_action = QAction("Segment", self)
-        self.stretch_semi_action = QAction("Stretch", self)
-        self.slice_semi_action = QAction("Slice", self)
-
-        self.warp_attach_semi_action = QAction("Warp+Attach", self)
-        self.warp_chain_semi_action = QAction("Warp+Chain", self)
-        self.war_regress_semi_action = QAction("Warp+Regress", self)
-        self.warp_stretch_semi_action = QAction("Warp+Stretch", self)
+
+        # one action per registered algorithm and mode, e.g. "Warp+Attach"
+        self.correction_actions = {
+            (name, mode): QAction(name.title(), self)
+            for mode in algorithms.MODES
+            for name in algorithms.names(mode=mode)
+        }
 
         self.fixation_report_action = QAction("Fixation Report", self)
         self.saccade_report_action = QAction("Saccade Report", self)
@@ -485,9 +462,10 @@ class Ui_Main_Window(QMainWindow, QtStyleTools):
         self.aoi_metrics_report_action = QAction("AOI Metrics Report", self)
 
         self.ascii_to_csv_converter_action = QAction("ASCII to CSV (one trial)", self)
-        self.json_to_csv_converter_action = QAction("JSON to CSV (one trial)", self)
-        self.csv_to_json_converter_action = QAction("CSV to JSON (one trial)", self)
+        self.json_to_csv_converter_action = QAction("JSON to CSV/NPY (one trial)", self)
+        self.csv_to_json_converter_action = QAction("CSV to JSON/NPY (one trial)", self)
         self.eyelink_experiment_to_csv_converter_action = QAction("Eyelink Experiment to CSV", self)
+        self.samples_to_csv_converter_action = QAction("Raw Samples to CSV (detect fixations)", self)
 
         self.assign_line_1_action = QAction("Assign to Line 1", self)
         self.assign_line_2_action = QAction("Assign to Line 2", self)
@@ -583,33 +561,12 @@ class Ui_Main_Window(QMainWindow, QtStyleTools):
         self.filters_menu.addAction(self.outside_screen_filter_action)
 
         self.correction_menu.addAction(self.manual_correction_action)
-        self.automated_correction_menu.addAction(self.warp_auto_action)
-        self.automated_correction_menu.addAction(self.attach_auto_action)
-        self.automated_correction_menu.addAction(self.chain_auto_action)
-        self.automated_correction_menu.addAction(self.cluster_auto_action)
-        self.automated_correction_menu.addAction(self.merge_auto_action)
-        self.automated_correction_menu.addAction(self.regress_auto_action)
-        self.automated_correction_menu.addAction(self.segment_auto_action)
-        self.automated_correction_menu.addAction(self.stretch_auto_action)
-        self.automated_correction_menu.addAction(self.slice_auto_action)
-        self.automated_correction_menu.addAction(self.warp_attach_auto_action)
-        self.automated_correction_menu.addAction(self.warp_chain_auto_action)
-        self.automated_correction_menu.addAction(self.war_regress_auto_action)
-        self.automated_correction_menu.addAction(self.warp_stretch_auto_action)
-
-        self.semi_auto_correction_menu.addAction(self.warp_semi_action)
-        self.semi_auto_correction_menu.addAction(self.attach_semi_action)
-        self.semi_auto_correction_menu.addAction(self.chain_semi_action)
-        self.semi_auto_correction_menu.addAction(self.cluster_semi_action)
-        self.semi_auto_correction_menu.addAction(self.merge_semi_action)
-        self.semi_auto_correction_menu.addAction(self.regress_semi_action)
-        self.semi_auto_correction_menu.addAction(self.segment_semi_action)
-        self.semi_auto_correction_menu.addAction(self.stretch_semi_action)
-        self.semi_auto_correction_menu.addAction(self.slice_semi_action)
-        self.semi_auto_correction_menu.addAction(self.warp_attach_semi_action)
-        self.semi_auto_correction_menu.addAction(self.warp_chain_semi_action)
-        self.semi_auto_correction_menu.addAction(self.war_regress_semi_action)
-        self.semi_auto_correction_menu.addAction(self.warp_stretch_semi_action)
+        correction_mode_menus = {
+            algorithms.AUTO: self.automated_correction_menu,
+            algorithms.SEMI: self.semi_auto_correction_menu,
+        }
+        for (_, mode), action in self.correction_actions.items():
+            correction_mode_menus[mode].addAction(action)
 
         self.analyses_menu.addAction(self.fixation_report_action)
         self.analyses_menu.addAction(self.saccade_report_action)
@@ -620,6 +577,7 @@ class Ui_Main_Window(QMainWindow, QtStyleTools):
         self.converters_menu.addAction(self.json_to_csv_converter_action)
         self.converters_menu.addAction(self.csv_to_json_converter_action)
         self.converters_menu.addAction(self.eyelink_experiment_to_csv_converter_action)
+        self.converters_menu.addAction(self.samples_to_csv_converter_action)
 
         # add menu item called "Style" to the menu bar
         self.menu_style = self.menuBar().addMenu("Appearance")
@@ -721,33 +679,8 @@ class Ui_Main_Window(QMainWindow, QtStyleTools):
         self.merge_fixations_filter_action.triggered.connect(self.fix8.merge_fixations)
         self.outside_screen_filter_action.triggered.connect(self.fix8.outside_screen_filter)
 
-        self.warp_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('warp', drift.warp, 'auto'))
-        self.attach_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('attach', drift.attach, 'auto'))
-        self.chain_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('chain', drift.chain, 'auto'))
-        self.cluster_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('cluster', drift.cluster, 'auto'))
-        self.merge_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('merge', drift.merge, 'auto'))
-        self.regress_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('regress', drift.regress, 'auto'))
-        self.segment_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('segment', drift.segment, 'auto'))
-        self.stretch_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('stretch', drift.stretch, 'auto'))
-        self.slice_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('slice', drift.slice, 'auto'))
-        self.warp_attach_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('warp+attach', correction.warp_regs, 'auto', drift.attach))
-        self.warp_chain_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('warp+chain', correction.warp_regs, 'auto', drift.chain))
-        self.war_regress_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('warp+regress', correction.warp_regs, 'auto', drift.regress))
-        self.warp_stretch_auto_action.triggered.connect(lambda: self.fix8.run_algorithm('warp+stretch', correction.warp_regs, 'auto', drift.stretch))
-
-        self.warp_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('warp', drift.warp, 'semi'))
-        self.attach_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('attach', drift.attach, 'semi'))
-        self.chain_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('chain', drift.chain, 'semi'))
-        self.cluster_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('cluster', drift.cluster, 'semi'))
-        self.merge_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('merge', drift.merge, 'semi'))
-        self.regress_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('regress', drift.regress, 'semi'))
-        self.segment_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('segment', drift.segment, 'semi'))
-        self.stretch_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('stretch', drift.stretch, 'semi'))
-        self.slice_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('slice', drift.slice, 'semi'))
-        self.warp_attach_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('warp+attach', correction.warp_regs, 'semi', drift.attach))
-        self.warp_chain_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('warp+chain', correction.warp_regs, 'semi', drift.chain))
-        self.war_regress_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('warp+regress', correction.warp_regs, 'semi', drift.regress))
-        self.warp_stretch_semi_action.triggered.connect(lambda: self.fix8.run_algorithm('warp+stretch', correction.warp_regs, 'semi', drift.stretch))
+        for (name, mode), action in self.correction_actions.items():
+            action.triggered.connect(lambda checked=False, name=name, mode=mode: self.fix8.run_algorithm(name, mode))
 
         self.manual_correction_action.triggered.connect(self.fix8.manual_correction)
 
@@ -760,6 +693,7 @@ class Ui_Main_Window(QMainWindow, QtStyleTools):
         self.json_to_csv_converter_action.triggered.connect(self.fix8.json_to_csv_converter)
         self.csv_to_json_converter_action.triggered.connect(self.fix8.csv_to_json_converter)
         self.eyelink_experiment_to_csv_converter_action.triggered.connect(self.fix8.eyelink_experiment_to_csv_converter)
+        self.samples_to_csv_converter_action.triggered.connect(self.fix8.samples_to_csv_converter)
 
         self.assign_line_1_action.triggered.connect(lambda: self.fix8.assign_fixation_to_line(1))
         self.assign_line_2_action.triggered.connect(lambda: self.fix8.assign_fixation_to_line(2))